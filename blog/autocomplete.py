@@ -0,0 +1,73 @@
+"""
+Title and tag typeahead for the blog search box.
+
+Published post titles and tags are held in a sorted in-process array that is
+searched with ``bisect``. Every title is indexed from each of its words, so
+"rest" finds "Building REST APIs". The array is rebuilt when the blog content
+version changes (see ``blog.cache``), so lookups never query SQLite.
+"""
+import re
+from bisect import bisect_left
+
+from django.urls import reverse
+from django.utils.text import slugify
+
+from core.snapshots import Snapshot
+from core.tagging import parse_tags
+
+from . import cache
+from .models import BlogPost
+
+MAX_RESULTS = 8
+# Upper bound on entries examined per lookup for very short prefixes.
+MAX_SCAN = 400
+
+_SPACE_RE = re.compile(r'\s+')
+
+
+def normalize(text):
+    return _SPACE_RE.sub(' ', text.lower()).strip()
+
+
+class PrefixIndex:
+    def __init__(self, entries):
+        entries.sort()
+        self.keys = [key for key, _, _, _ in entries]
+        self.values = [(kind, label, url) for _, kind, label, url in entries]
+
+    def lookup(self, prefix, limit=MAX_RESULTS):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        results = []
+        seen = set()
+        start = bisect_left(self.keys, prefix)
+        for index in range(start, min(start + MAX_SCAN, len(self.keys))):
+            if not self.keys[index].startswith(prefix):
+                break
+            kind, label, url = self.values[index]
+            if url in seen:
+                continue
+            seen.add(url)
+            results.append({'type': kind, 'label': label, 'url': url})
+            if len(results) >= limit:
+                break
+        return results
+
+
+def build_index():
+    entries = []
+    tags = {}
+    for title, slug, post_tags in BlogPost.objects.filter(published=True).values_list('title', 'slug', 'tags'):
+        url = reverse('blog_detail', args=[slug])
+        words = normalize(title).split(' ')
+        for position in range(len(words)):
+            entries.append((' '.join(words[position:]), 'post', title, url))
+        for name in parse_tags(post_tags):
+            tags.setdefault(slugify(name), name)
+    for slug, name in tags.items():
+        entries.append((normalize(name), 'tag', name, reverse('blog_tag', args=[slug])))
+    return PrefixIndex(entries)
+
+
+index = Snapshot('blog:autocomplete', build_index, version=cache.content_version)
@@ -0,0 +1,95 @@
+"""
+Response cache for ``blog_detail``.
+
+Rendered pages are stored under ``blog_detail:<slug>:<stamp>:<site>``, where
+the stamp is derived from the post's last change (``updated_at``, or
+``related_updated_at`` when ``blog.related`` rewrote its related list later)
+and its renderer version. The stamp is a pure function of those columns, so
+the page key, the ETag and Last-Modified agree whether they come from the
+cache or the database. A per-slug pointer key holds the current stamp; the
+``blog.signals`` receivers move it forward on save and drop it on delete or
+when the related posts change, which makes every older page unreachable for
+all workers sharing the cache backend at once.
+
+A blog-wide content version, bumped on every post save or delete, lets list
+pages and feeds validate (and key their caches) without touching the
+database.
+
+``page_stats`` counts page cache hits and misses for
+``manage.py blog_cache_stats``.
+"""
+from django.core.cache import cache
+
+from core import snapshots
+from core.counters import Counters
+
+PAGE_TIMEOUT = 60 * 60 * 24
+
+VERSION_KEY = 'blog:version'
+
+page_stats = Counters({'hit': 'blog_detail:stats:hits', 'miss': 'blog_detail:stats:misses'})
+
+
+def make_stamp(updated_at, render_version, related_updated_at=None):
+    changed = max(updated_at, related_updated_at) if related_updated_at else updated_at
+    return f'{changed.timestamp():.6f}-{render_version}'
+
+
+def post_stamp(post):
+    return make_stamp(post.updated_at, post.render_version, post.related_updated_at)
+
+
+# Post stamps and content versions both start with a timestamp.
+stamp_time = snapshots.version_time
+
+
+def content_version():
+    """Return the blog-wide content version, starting a new one if it was evicted."""
+    return snapshots.get_version(VERSION_KEY)
+
+
+def bump_version():
+    snapshots.bump_version(VERSION_KEY)
+
+
+def _pointer_key(slug):
+    return f'blog_detail:{slug}'
+
+
+def site(request):
+    """Scheme and host: the only parts of a request a cached page may depend on."""
+    return f'{request.scheme}://{request.get_host()}'
+
+
+def _page_key(slug, stamp, site):
+    return f'blog_detail:{slug}:{stamp}:{site}'
+
+
+def current_stamp(slug):
+    return cache.get(_pointer_key(slug))
+
+
+def get_page(request, slug):
+    stamp = cache.get(_pointer_key(slug))
+    content = None
+    if stamp is not None:
+        content = cache.get(_page_key(slug, stamp, site(request)))
+    page_stats.record('miss' if content is None else 'hit')
+    return content
+
+
+def set_page(request, post, content):
+    # Stored under the stamp of the data it was rendered from: if the pointer
+    # has already moved on, the page is simply never read.
+    stamp = post_stamp(post)
+    cache.add(_pointer_key(post.slug), stamp, PAGE_TIMEOUT)
+    cache.set(_page_key(post.slug, stamp, site(request)), content, PAGE_TIMEOUT)
+
+
+def touch(post):
+    cache.set(_pointer_key(post.slug), post_stamp(post), PAGE_TIMEOUT)
+
+
+def invalidate(*slugs):
+    cache.delete_many([_pointer_key(slug) for slug in slugs])
+
@@ -0,0 +1,66 @@
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache as django_cache
+from django.http import HttpResponse
+from django.urls import reverse, reverse_lazy
+from django.utils.feedgenerator import Atom1Feed
+
+from . import cache
+from .models import BlogPost
+
+FEED_ITEMS = 20
+FEED_TIMEOUT = 60 * 60 * 24
+
+
+class LatestPostsFeed(Feed):
+    title = "Suresh Kumar Yadav - Blog"
+    link = reverse_lazy('blog_list')
+    description = "Insights, tutorials, and thoughts on web development, programming, and technology."
+
+    def items(self):
+        # Feeds only need the stored excerpt, never the (large) post bodies.
+        return (
+            BlogPost.objects.filter(published=True, published_at__isnull=False)
+            .select_related('author')
+            .only('title', 'slug', 'excerpt', 'tags', 'published_at', 'updated_at',
+                  'author__username', 'author__first_name', 'author__last_name')
+            .order_by('-published_at', '-id')[:FEED_ITEMS]
+        )
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.excerpt
+
+    def item_link(self, item):
+        return reverse('blog_detail', args=[item.slug])
+
+    def item_pubdate(self, item):
+        return item.published_at
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_categories(self, item):
+        return item.tags
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+def serve(feed, request):
+    """
+    Return ``feed`` from the cache, generating it at most once per content
+    version, scheme and host.
+    """
+    key = f'blog_feed:{feed.__class__.__name__}:{cache.site(request)}:{cache.content_version()}'
+    content = django_cache.get(key)
+    if content is None:
+        content = feed(request).content
+        django_cache.set(key, content, FEED_TIMEOUT)
+    return HttpResponse(content, content_type=feed.feed_type.content_type)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from blog import cache
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss counts for the blog post page cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing them.')
+
+    def handle(self, *args, **options):
+        stats = cache.page_stats.totals()
+        total = stats['hit'] + stats['miss']
+        ratio = stats['hit'] / total if total else 0
+        self.stdout.write(f"hits: {stats['hit']}  misses: {stats['miss']}  hit ratio: {ratio:.1%}")
+        if options['reset']:
+            cache.page_stats.reset()
+            self.stdout.write('Counters reset.')
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import related
+
+
+class Command(BaseCommand):
+    help = 'Recompute the related posts of every published blog post.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Recompute every term vector too (needed after changing how vectors are built).',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = related.rebuild(full=options['full'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Computed related posts for {count} posts in {elapsed:.1f}s.'))
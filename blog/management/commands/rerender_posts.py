@@ -0,0 +1,63 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from blog import cache
+from blog.models import BlogPost
+from blog.rendering import RENDERER_VERSION, render_markdown
+
+RENDERED_FIELDS = ['content_html', 'toc_html', 'word_count', 'reading_time', 'render_version']
+
+
+class Command(BaseCommand):
+    help = 'Re-render stored blog post HTML produced by an older renderer version.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-render every post, not only stale ones.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        posts = BlogPost.objects.all()
+        if not options['all']:
+            posts = posts.exclude(render_version=RENDERER_VERSION)
+        # Only the ids up front: post bodies are loaded, rendered and written
+        # one batch at a time, so memory does not grow with the blog.
+        pks = list(posts.order_by('pk').values_list('pk', flat=True))
+        if not pks:
+            self.stdout.write('All posts are up to date.')
+            return
+
+        batch_size = options['batch_size']
+        workers = options['workers']
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for start in range(0, len(pks), batch_size):
+                rows = list(BlogPost.objects.filter(pk__in=pks[start:start + batch_size]).values_list(
+                    'pk', 'content', 'slug'
+                ))
+                # Child processes only run Markdown; never share DB
+                # connections with them (the pool may fork more at any map).
+                connections.close_all()
+                results = executor.map(
+                    render_markdown,
+                    [content for _, content, _ in rows],
+                    chunksize=max(1, len(rows) // (workers * 4)),
+                )
+                BlogPost.objects.bulk_update([
+                    BlogPost(
+                        pk=pk,
+                        content_html=rendered.html,
+                        toc_html=rendered.toc_html,
+                        word_count=rendered.word_count,
+                        reading_time=rendered.reading_time,
+                        render_version=RENDERER_VERSION,
+                    )
+                    for (pk, _, _), rendered in zip(rows, results)
+                ], RENDERED_FIELDS)
+                # bulk_update() sends no signals, so drop the cached pages explicitly.
+                cache.invalidate(*[slug for _, _, slug in rows])
+
+        cache.bump_version()
+        self.stdout.write(self.style.SUCCESS(f'Re-rendered {len(pks)} posts.'))
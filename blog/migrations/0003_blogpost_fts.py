@@ -0,0 +1,37 @@
+from django.db import migrations
+
+CREATE_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS blog_blogpost_fts USING fts5(
+    title, excerpt, content, tags,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+)
+"""
+
+POPULATE_SQL = """
+INSERT INTO blog_blogpost_fts (rowid, title, excerpt, content, tags)
+SELECT id, title, excerpt, content, tags FROM blog_blogpost WHERE published = 1
+"""
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_SQL)
+    schema_editor.execute(POPULATE_SQL)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS blog_blogpost_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_alter_blogpost_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_related_posts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='related_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_blogpost_related_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postvector',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
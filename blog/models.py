@@ -1,18 +1,74 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from core.tagging import parse_tags
+
+from .rendering import RENDERER_VERSION, render_markdown
 
 class BlogPost(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
-    content = models.TextField()
+    content = models.TextField(help_text="Markdown")
+    content_html = models.TextField(blank=True, editable=False)
+    toc_html = models.TextField(blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveSmallIntegerField(default=0, editable=False, help_text="Minutes")
+    render_version = models.PositiveSmallIntegerField(default=0, editable=False)
     excerpt = models.TextField(blank=True)
     image = models.URLField(blank=True, null=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     tags = models.JSONField(default=list, help_text="List of tags")
+    tag_index = models.ManyToManyField('core.Tag', blank=True, editable=False, related_name='blog_posts')
     published = models.BooleanField(default=False)
     published_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Set by blog.related when the post's related list changes; part of the page stamp.
+    related_updated_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Backs keyset pagination of the listing on (published_at, id).
+            models.Index(fields=['published', 'published_at', 'id'], name='blog_post_listing_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+    def render_content(self):
+        rendered = render_markdown(self.content)
+        self.content_html = rendered.html
+        self.toc_html = rendered.toc_html
+        self.word_count = rendered.word_count
+        self.reading_time = rendered.reading_time
+        self.render_version = RENDERER_VERSION
+
+    def save(self, *args, **kwargs):
+        if self.published and self.published_at is None:
+            self.published_at = timezone.now()
+        self.tags = parse_tags(self.tags)
+        self.render_content()
+        super().save(*args, **kwargs)
+
+class PostVector(models.Model):
+    """Hashed term-frequency vector of a published post, see ``blog.related``."""
+    post = models.OneToOneField(BlogPost, on_delete=models.CASCADE, primary_key=True, related_name='term_vector')
+    vector = models.BinaryField()
+    # Lets blog.related sync only the vectors written since its last read.
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+class RelatedPost(models.Model):
+    post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='related_links')
+    related = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['post', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'rank'], name='blog_related_post_rank_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.post} -> {self.related}"
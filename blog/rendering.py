@@ -0,0 +1,51 @@
+"""
+Markdown rendering for blog posts.
+
+``BlogPost.content`` is Markdown. It is rendered once, when the post is saved,
+into ``content_html``/``toc_html`` together with its word count and reading
+time, so the detail page never has to run Markdown or Pygments. Bump
+``RENDERER_VERSION`` whenever the output below changes and run
+``manage.py rerender_posts`` to bring stored posts up to date.
+"""
+import math
+import re
+from typing import NamedTuple
+
+import markdown
+
+RENDERER_VERSION = 1
+
+WORDS_PER_MINUTE = 200
+
+EXTENSIONS = ['extra', 'codehilite', 'toc', 'sane_lists']
+
+EXTENSION_CONFIGS = {
+    'codehilite': {'css_class': 'codehilite', 'guess_lang': False},
+    'toc': {'permalink': True, 'permalink_class': 'heading-anchor', 'toc_depth': '2-3'},
+}
+
+_FENCE_RE = re.compile(r'^(```|~~~).*?^\1', re.MULTILINE | re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]+>')
+_WORD_RE = re.compile(r'\w+(?:[\'’]\w+)*')
+
+
+class RenderedContent(NamedTuple):
+    html: str
+    toc_html: str
+    word_count: int
+    reading_time: int
+
+
+def count_words(text):
+    """Count prose words, ignoring fenced code blocks and inline HTML tags."""
+    prose = _TAG_RE.sub(' ', _FENCE_RE.sub(' ', text))
+    return len(_WORD_RE.findall(prose))
+
+
+def render_markdown(text):
+    md = markdown.Markdown(extensions=EXTENSIONS, extension_configs=EXTENSION_CONFIGS)
+    html = md.convert(text or '')
+    toc_html = md.toc if '<li>' in md.toc else ''
+    word_count = count_words(text or '')
+    reading_time = max(1, math.ceil(word_count / WORDS_PER_MINUTE))
+    return RenderedContent(html, toc_html, word_count, reading_time)
@@ -0,0 +1,125 @@
+"""
+Full-text search for published blog posts, backed by an SQLite FTS5 table.
+
+The ``blog_blogpost_fts`` virtual table is created by migration 0003 and kept
+in sync with ``BlogPost`` by the receivers in ``blog.signals``. Only published
+posts are indexed; the rowid of each entry is the post's primary key.
+"""
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+TABLE = 'blog_blogpost_fts'
+
+# bm25() column weights, in table column order: title, excerpt, content, tags.
+WEIGHTS = (10.0, 4.0, 1.0, 6.0)
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+# snippet()/highlight() wrap matches in these control characters so the text
+# can be HTML-escaped before they are turned into <mark> tags.
+_MARK_START = '\x02'
+_MARK_END = '\x03'
+SNIPPET_TOKENS = 24
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+def tags_text(tags):
+    if isinstance(tags, str):
+        return tags.replace(',', ' ')
+    return ' '.join(str(tag) for tag in tags or [])
+
+
+def match_expression(query):
+    """Turn free text into an FTS5 query: every term must match as a prefix."""
+    terms = _TERM_RE.findall(query.lower())
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def index_post(post):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post.pk])
+        if post.published:
+            cursor.execute(
+                f'INSERT INTO {TABLE} (rowid, title, excerpt, content, tags) '
+                'VALUES (%s, %s, %s, %s, %s)',
+                [post.pk, post.title, post.excerpt, post.content, tags_text(post.tags)],
+            )
+
+
+def remove_post(post_id):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post_id])
+
+
+def rebuild_index():
+    from .models import BlogPost
+
+    posts = BlogPost.objects.filter(published=True).values_list(
+        'pk', 'title', 'excerpt', 'content', 'tags'
+    )
+    rows = [
+        (pk, title, excerpt, content, tags_text(tags))
+        for pk, title, excerpt, content, tags in posts.iterator()
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (rowid, title, excerpt, content, tags) '
+            'VALUES (%s, %s, %s, %s, %s)',
+            rows,
+        )
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+    return len(rows)
+
+
+def search(query):
+    """Return the ids of matching posts, best match first."""
+    expression = match_expression(query)
+    if not expression:
+        return []
+    weights = ', '.join(str(weight) for weight in WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s '
+            f'ORDER BY bm25({TABLE}, {weights})',
+            [expression],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _marked(text):
+    """Escape ``text`` and turn only the FTS5 sentinels into <mark> tags."""
+    text = escape(text.strip())
+    return mark_safe(text.replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>'))
+
+
+def highlights(query, ids):
+    """
+    Return ``{id: (title, snippet)}`` with matched terms wrapped in <mark>.
+
+    FTS5 builds the snippet from the best-matching column using the phrase
+    positions it already found, so the cost does not grow with post length.
+    Only ``ids`` (the current page) are looked up.
+    """
+    expression = match_expression(query)
+    if not expression or not ids:
+        return {}
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid, highlight({TABLE}, 0, %s, %s), '
+            f'snippet({TABLE}, -1, %s, %s, %s, %s) '
+            f'FROM {TABLE} WHERE {TABLE} MATCH %s AND rowid IN ({placeholders})',
+            [_MARK_START, _MARK_END, _MARK_START, _MARK_END, '\u2026', SNIPPET_TOKENS, expression, *ids],
+        )
+        return {pk: (_marked(title), _marked(snippet)) for pk, title, snippet in cursor.fetchall()}
@@ -0,0 +1,39 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from core.tagging import sync_tags
+
+from . import cache, related, search
+from .models import BlogPost
+
+
+@receiver(pre_save, sender=BlogPost)
+def forget_renamed_slug(sender, instance, **kwargs):
+    if instance.pk is None:
+        return
+    old_slug = sender.objects.filter(pk=instance.pk).values_list('slug', flat=True).first()
+    if old_slug and old_slug != instance.slug:
+        cache.invalidate(old_slug)
+
+
+@receiver(post_save, sender=BlogPost)
+def index_blog_post(sender, instance, **kwargs):
+    search.index_post(instance)
+    sync_tags(instance)
+    cache.touch(instance)
+    cache.bump_version()
+    related.queue_update(instance)
+
+
+@receiver(pre_delete, sender=BlogPost)
+def remember_related_listings(sender, instance, **kwargs):
+    # The delete cascades these rows away before post_delete runs.
+    instance._listed_by = related.listing_posts(instance.pk)
+
+
+@receiver(post_delete, sender=BlogPost)
+def unindex_blog_post(sender, instance, **kwargs):
+    search.remove_post(instance.pk)
+    cache.invalidate(instance.slug)
+    cache.bump_version()
+    related.queue_update(instance, getattr(instance, '_listed_by', ()), deleted=True)
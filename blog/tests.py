@@ -1,3 +1,453 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from xml.etree import ElementTree
 
-# Create your tests here.
+import numpy as np
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.utils import timezone
+from core import jobs
+from core.models import Job
+from core.tagging import parse_tags
+from core.testing import BAD_CURSORS, QueryBudgetTestCase
+from . import feeds, related, rendering, search
+from .models import BlogPost, PostVector, RelatedPost
+
+class BlogQueryBudgetTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = User.objects.create(username='author')
+        self.post = self.create_post('Getting started with Django')
+
+    def create_post(self, title):
+        index = BlogPost.objects.count()
+        return BlogPost.objects.create(
+            title=title,
+            slug=f'post-{index}',
+            content=f'# {title}\n\nDjango tutorial number {index}.',
+            excerpt='An introduction to Django.',
+            author=self.author,
+            tags=['Django', 'Python'],
+            published=True,
+        )
+
+    def add_posts(self, count):
+        for index in range(count):
+            self.create_post(f'Django post {index}')
+
+    def add_related(self, count):
+        for index in range(count):
+            related = self.create_post(f'Related post {index}')
+            rank = self.post.related_links.count()
+            RelatedPost.objects.create(post=self.post, related=related, score=1.0, rank=rank)
+
+    def test_blog_list(self):
+        self.assertBudgetHolds('/blog/', 2, self.add_posts)
+
+    def test_blog_list_legacy_pages(self):
+        self.assertBudgetHolds('/blog/?page=1', 2, self.add_posts)
+
+    def test_blog_search(self):
+        self.assertBudgetHolds('/blog/?q=django', 3, self.add_posts)
+
+    def test_blog_tag(self):
+        self.assertBudgetHolds('/blog/tag/django/', 3, self.add_posts)
+
+    def test_blog_detail(self):
+        self.assertBudgetHolds(f'/blog/{self.post.slug}/', 3, self.add_related, sizes=(1, 3))
+
+    def test_blog_detail_cached(self):
+        self.assertQueryBudget(f'/blog/{self.post.slug}/', 3)
+        self.assertQueryBudget(f'/blog/{self.post.slug}/', 0)
+
+    def test_feeds(self):
+        self.assertBudgetHolds('/blog/feed/rss/', 1, self.add_posts)
+        self.assertBudgetHolds('/blog/feed/atom/', 1, self.add_posts)
+
+    def test_autocomplete(self):
+        self.assertBudgetHolds('/blog/autocomplete/?q=dja', 1, self.add_posts)
+        self.assertQueryBudget('/blog/autocomplete/?q=dja', 0)
+
+class BlogPaginationTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        author = User.objects.create(username='author')
+        start = timezone.now() - timedelta(days=30)
+        for index in range(14):
+            BlogPost.objects.create(
+                title=f'Post {index}', slug=f'post-{index}', content='Text', author=author,
+                published=True, published_at=start + timedelta(days=index // 2),
+            )
+        self.expected = list(BlogPost.objects.order_by('-published_at', '-id').values_list('pk', flat=True))
+
+    def test_forward_and_back(self):
+        pages = []
+        response = self.client.get('/blog/')
+        while True:
+            page = response.context['page_obj']
+            pages.append([post.pk for post in page])
+            if not page.has_next:
+                break
+            response = self.client.get(f'/blog/?after={page.next_cursor}')
+        self.assertEqual([pk for page in pages for pk in page], self.expected)
+        self.assertEqual([len(page) for page in pages], [6, 6, 2])
+
+        for expected in reversed(pages[:-1]):
+            response = self.client.get(f'/blog/?before={page.previous_cursor}')
+            page = response.context['page_obj']
+            self.assertEqual([post.pk for post in page], expected)
+        self.assertFalse(page.has_previous)
+
+    def test_bad_cursor_falls_back_to_first_page(self):
+        for cursor in BAD_CURSORS:
+            for param in ('after', 'before'):
+                response = self.client.get(f'/blog/?{param}={cursor}')
+                self.assertEqual(response.status_code, 200, cursor)
+                self.assertEqual([post.pk for post in response.context['page_obj']], self.expected[:6])
+        response = self.client.get(f'/blog/tag/nothing/?after={BAD_CURSORS[0]}')
+        self.assertEqual(response.status_code, 404)
+
+class BlogSearchTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = User.objects.create(username='author')
+
+    def create_post(self, slug, title, content, **fields):
+        fields.setdefault('published', True)
+        return BlogPost.objects.create(title=title, slug=slug, content=content, author=self.author, **fields)
+
+    def test_title_matches_rank_first(self):
+        in_body = self.create_post('body', 'Deploying apps', 'This one mentions Kubernetes once.')
+        in_title = self.create_post('title', 'Kubernetes for beginners', 'A first cluster.')
+        tagged = self.create_post('tagged', 'Containers', 'Pods and services.', tags=['kubernetes'])
+        self.assertEqual(search.search('kubernetes'), [in_title.pk, tagged.pk, in_body.pk])
+        # Every term must match, each as a prefix.
+        self.assertEqual(search.search('kube begin'), [in_title.pk])
+        self.assertEqual(search.search('kubernetes nomad'), [])
+
+    def test_unpublished_and_deleted_posts_leave_the_index(self):
+        draft = self.create_post('draft', 'Celery tips', 'Queues.', published=False)
+        post = self.create_post('post', 'Celery basics', 'Workers.')
+        self.assertEqual(search.search('celery'), [post.pk])
+
+        draft.published = True
+        draft.save()
+        self.assertEqual(set(search.search('celery')), {draft.pk, post.pk})
+
+        post.published = False
+        post.save()
+        self.assertEqual(search.search('celery'), [draft.pk])
+
+        draft.delete()
+        self.assertEqual(search.search('celery'), [])
+        response = self.client.get('/blog/?q=celery')
+        self.assertEqual(list(response.context['page_obj']), [])
+
+    def test_highlights_escape_everything_but_marks(self):
+        post = self.create_post(
+            'tips', 'C# tips & <b>tricks</b>', 'Use a | pipe and <script>alert(1)</script> with tips.',
+        )
+        title, _ = search.highlights('tips', [post.pk])[post.pk]
+        self.assertEqual(title, 'C# <mark>tips</mark> &amp; &lt;b&gt;tricks&lt;/b&gt;')
+        _, snippet = search.highlights('pipe', [post.pk])[post.pk]
+        self.assertIn('a | <mark>pipe</mark> and &lt;script&gt;alert(1)&lt;/script&gt;', snippet)
+        response = self.client.get('/blog/?q=tips')
+        self.assertContains(response, 'C# <mark>tips</mark> &amp; &lt;b&gt;tricks&lt;/b&gt;', html=False)
+        self.assertNotContains(response, '<script>alert(1)')
+
+class RenderingTests(SimpleTestCase):
+
+    def test_markdown_toc_and_highlighting(self):
+        rendered = rendering.render_markdown(
+            '# Title\n\n## Setup\n\nSome *text*.\n\n### Install\n\n```python\nimport os\n```\n'
+        )
+        self.assertIn('<em>text</em>', rendered.html)
+        self.assertIn('<h2 id="setup">', rendered.html)
+        self.assertIn('class="codehilite"', rendered.html)
+        # toc_depth 2-3: the h1 is left out.
+        self.assertIn('href="#setup"', rendered.toc_html)
+        self.assertIn('href="#install"', rendered.toc_html)
+        self.assertNotIn('href="#title"', rendered.toc_html)
+
+    def test_no_toc_without_headings(self):
+        self.assertEqual(rendering.render_markdown('Just a paragraph.').toc_html, '')
+
+    def test_reading_time_ignores_code(self):
+        prose = ' '.join(['word'] * 450)
+        code = '```\n' + ' '.join(['token'] * 1000) + '\n```'
+        rendered = rendering.render_markdown(f"{prose}\n\n{code}\n\n<span>it's</span>")
+        self.assertEqual(rendered.word_count, 451)
+        self.assertEqual(rendered.reading_time, 3)
+        self.assertEqual(rendering.render_markdown('').reading_time, 1)
+
+class RenderedPostTests(QueryBudgetTestCase):
+
+    def test_save_stores_rendered_html(self):
+        post = BlogPost.objects.create(
+            title='Rendered', slug='rendered', content='## Heading\n\nBody text.',
+            author=User.objects.create(username='author'), published=True,
+        )
+        self.assertIn('<h2 id="heading">', post.content_html)
+        self.assertEqual(post.render_version, rendering.RENDERER_VERSION)
+        response = self.client.get('/blog/rendered/')
+        self.assertContains(response, '<h2 id="heading">')
+        self.assertContains(response, 'href="#heading"')
+        self.assertContains(response, '1 min read')
+
+    def test_rerender_posts_in_batches(self):
+        author = User.objects.create(username='author')
+        for index in range(5):
+            BlogPost.objects.create(
+                title=f'Post {index}', slug=f'post-{index}', content=f'## Part {index}', author=author, published=True,
+            )
+        BlogPost.objects.exclude(slug='post-4').update(content_html='', render_version=0)
+        with mock.patch.object(BlogPost.objects, 'bulk_update', wraps=BlogPost.objects.bulk_update) as bulk_update:
+            call_command('rerender_posts', workers=1, batch_size=2, stdout=StringIO())
+        self.assertEqual([len(call.args[0]) for call in bulk_update.call_args_list], [2, 2])
+        for post in BlogPost.objects.all():
+            self.assertEqual(post.render_version, rendering.RENDERER_VERSION)
+            self.assertIn(f'<h2 id="part-{post.slug[-1]}">', post.content_html)
+
+class TagTests(QueryBudgetTestCase):
+
+    def test_parse_tags(self):
+        self.assertEqual(parse_tags('Django, python ,django,, C++'), ['Django', 'python', 'C++'])
+        self.assertEqual(parse_tags(['Web Dev', 'web-dev']), ['Web Dev'])
+        self.assertEqual(parse_tags(None), [])
+
+    def test_tag_listing_follows_saved_tags(self):
+        author = User.objects.create(username='author')
+        django_post = BlogPost.objects.create(
+            title='Django', slug='django', content='Text', author=author, published=True, tags='Django, Python',
+        )
+        BlogPost.objects.create(title='Go', slug='go', content='Text', author=author, published=True, tags=['Go'])
+        self.assertEqual(sorted(django_post.tag_index.values_list('slug', flat=True)), ['django', 'python'])
+        response = self.client.get('/blog/tag/django/')
+        self.assertEqual([post.slug for post in response.context['page_obj']], ['django'])
+
+        django_post.tags = ['Python']
+        django_post.save()
+        response = self.client.get('/blog/tag/django/')
+        self.assertEqual(list(response.context['page_obj']), [])
+        self.assertEqual(self.client.get('/blog/tag/missing/').status_code, 404)
+
+class PostPageTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.post = BlogPost.objects.create(
+            title='Caching', slug='caching', content='First version.',
+            author=User.objects.create(username='author'), published=True,
+        )
+        self.url = '/blog/caching/'
+
+    def edit(self, content):
+        self.post.content = content
+        self.post.save()
+
+    def test_page_cache(self):
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'HIT')
+        self.edit('Second version.')
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertContains(response, 'Second version.')
+        self.post.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_query_string_cannot_change_cached_page(self):
+        response = self.client.get(self.url, {'ref': '"evil.example/'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertNotContains(response, 'evil.example')
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertNotContains(response, 'evil.example')
+        self.assertContains(response, 'u=http%3A%2F%2Ftestserver%2Fblog%2Fcaching%2F"')
+
+        response = self.client.get(self.url, secure=True)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertContains(response, 'u=https%3A%2F%2Ftestserver%2Fblog%2Fcaching%2F"')
+
+    def test_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.edit('Second version.')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Second version.')
+
+    def test_if_modified_since(self):
+        # HTTP dates have one-second resolution; start from an older edit.
+        BlogPost.objects.filter(pk=self.post.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        cache.clear()
+        last_modified = self.client.get(self.url)['Last-Modified']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        self.edit('Second version.')
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+    def test_listing_validators(self):
+        response = self.client.get('/blog/')
+        self.assertEqual(self.client.get('/blog/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(
+            self.client.get('/blog/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304
+        )
+        self.edit('Second version.')
+        self.assertEqual(self.client.get('/blog/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+class RelatedPostsTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = User.objects.create(username='author')
+
+    def run_jobs(self):
+        for job in jobs.claim(100):
+            jobs.run(job.kind, job.payload)
+            jobs.complete(job)
+
+    def create_post(self, slug, title, tags):
+        post = BlogPost.objects.create(
+            title=title, slug=slug, content=title, author=self.author, published=True, tags=tags,
+        )
+        self.run_jobs()
+        return post
+
+    def test_saves_queue_the_update_for_the_worker(self):
+        with mock.patch.object(related, 'update_post') as update_post:
+            post = BlogPost.objects.create(
+                title='Django forms', slug='django-forms', content='Forms', author=self.author, published=True,
+                tags=['django'],
+            )
+        update_post.assert_not_called()
+        self.assertEqual(Job.objects.get(kind='blog.related').payload, {'post': post.pk, 'affected': []})
+        self.run_jobs()
+        self.create_post('django-views', 'Django views', ['django'])
+        self.assertEqual(self.related_slugs(post), ['django-views'])
+
+        post.title = 'Django model forms'
+        post.save()
+        self.assertEqual(Job.objects.filter(kind='blog.related', status=Job.PENDING).count(), 1)
+        self.run_jobs()
+        views = BlogPost.objects.get(slug='django-views')
+        self.assertEqual(self.related_slugs(views), ['django-forms'])
+
+        # The rows listing a deleted post cascade away; the job still knows them.
+        post.delete()
+        job = Job.objects.get(kind='blog.related', status=Job.PENDING)
+        self.assertEqual(job.payload['affected'], [views.pk])
+        self.run_jobs()
+        self.assertEqual(self.related_slugs(views), [])
+
+    def related_slugs(self, post):
+        return [link.related.slug for link in post.related_links.select_related('related')]
+
+    def test_related_change_updates_validators(self):
+        post = self.create_post('django-forms', 'Django forms', ['django', 'forms'])
+        self.create_post('rust-traits', 'Rust traits', ['rust'])
+        BlogPost.objects.update(updated_at=timezone.now() - timedelta(hours=1), related_updated_at=None)
+        cache.clear()
+
+        first = self.client.get('/blog/django-forms/')
+        second = self.client.get('/blog/django-forms/')
+        self.assertEqual(first['ETag'], second['ETag'])
+        self.assertNotContains(first, 'Django views')
+
+        self.create_post('django-views', 'Django views', ['django'])
+        self.assertIn('django-views', self.related_slugs(post))
+        response = self.client.get('/blog/django-forms/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Django views')
+        response = self.client.get('/blog/django-forms/', HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_tiled_nearest_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        weighted = related._weighted(rng.random((150, 16), dtype=np.float32))
+        with mock.patch.object(related, 'BLOCK_SIZE', 40):
+            neighbours, scores = related._nearest(weighted)
+        brute = weighted @ weighted.T
+        np.fill_diagonal(brute, -np.inf)
+        expected = np.sort(brute, axis=1)[:, ::-1][:, :related.TOP_K]
+        np.testing.assert_allclose(scores, expected, rtol=1e-5)
+        np.testing.assert_allclose(np.take_along_axis(brute, neighbours, axis=1), expected, rtol=1e-5)
+
+    def test_rebuild_reuses_fresh_vectors(self):
+        related.vectors.clear()
+        posts = [self.create_post(f'post-{index}', f'Django topic {index}', ['django']) for index in range(4)]
+        vector = PostVector.objects.get(post=posts[0])
+        PostVector.objects.filter(post=posts[0]).update(vector=np.ones(related.DIMENSIONS, np.float32).tobytes())
+        BlogPost.objects.filter(pk=posts[1].pk).update(updated_at=timezone.now() + timedelta(minutes=1))
+        with self.assertNumQueries(3):
+            self.assertEqual(related._refresh_vectors(), 1)
+        # posts[0]'s vector is newer than the post, so it was kept as stored.
+        self.assertNotEqual(PostVector.objects.get(post=posts[0]).vector, vector.vector)
+        self.assertEqual(related._refresh_vectors(full=True), 4)
+        self.assertEqual(bytes(PostVector.objects.get(post=posts[0]).vector), bytes(vector.vector))
+        related.rebuild()
+        self.assertEqual(RelatedPost.objects.filter(post=posts[0]).count(), related.TOP_K)
+
+    def test_vector_cache_syncs_changes(self):
+        related.vectors.clear()
+        posts = [self.create_post(f'post-{index}', f'Topic {index}', [f'tag{index}']) for index in range(3)]
+        ids, matrix = related.vectors.load()
+        self.assertEqual(ids, [post.pk for post in posts])
+
+        changed = np.full(related.DIMENSIONS, 2, np.float32)
+        PostVector.objects.filter(post=posts[1]).update(vector=changed.tobytes(), updated_at=timezone.now())
+        BlogPost.objects.filter(pk=posts[2].pk).update(published=False)
+        ids, matrix = related.vectors.load()
+        self.assertEqual(ids, [posts[0].pk, posts[1].pk])
+        np.testing.assert_array_equal(matrix[1], changed)
+        np.testing.assert_array_equal(matrix[0], related.term_vector('Topic 0', '', 'Topic 0', ['tag0']))
+
+class FeedTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = User.objects.create(username='author', first_name='Suresh', last_name='Yadav')
+        start = timezone.now() - timedelta(days=60)
+        for index in range(feeds.FEED_ITEMS + 2):
+            BlogPost.objects.create(
+                title=f'Post {index}', slug=f'post-{index}', content='Body', excerpt=f'Excerpt {index}',
+                author=self.author, published=True, published_at=start + timedelta(days=index), tags=['Django'],
+            )
+        BlogPost.objects.create(title='Draft', slug='draft', content='Body', author=self.author)
+
+    def test_rss_items(self):
+        response = self.client.get('/blog/feed/rss/')
+        self.assertEqual(response['Content-Type'], 'application/rss+xml; charset=utf-8')
+        items = ElementTree.fromstring(response.content).findall('channel/item')
+        self.assertEqual(len(items), feeds.FEED_ITEMS)
+        newest = items[0]
+        self.assertEqual(newest.findtext('title'), f'Post {feeds.FEED_ITEMS + 1}')
+        self.assertEqual(newest.findtext('description'), f'Excerpt {feeds.FEED_ITEMS + 1}')
+        self.assertTrue(newest.findtext('link').endswith(f'/blog/post-{feeds.FEED_ITEMS + 1}/'))
+        self.assertEqual(newest.findtext('category'), 'Django')
+        self.assertNotIn(b'Draft', response.content)
+
+    def test_cached_feed_keeps_the_scheme(self):
+        def link(response):
+            return ElementTree.fromstring(response.content).findtext('channel/item/link')
+
+        self.assertTrue(link(self.client.get('/blog/feed/rss/')).startswith('http://'))
+        self.assertTrue(link(self.client.get('/blog/feed/rss/', secure=True)).startswith('https://'))
+
+    def test_atom_items_follow_edits(self):
+        namespace = {'atom': 'http://www.w3.org/2005/Atom'}
+        response = self.client.get('/blog/feed/atom/')
+        entry = ElementTree.fromstring(response.content).find('atom:entry', namespace)
+        self.assertEqual(entry.findtext('atom:author/atom:name', namespaces=namespace), 'Suresh Yadav')
+
+        post = BlogPost.objects.get(slug=f'post-{feeds.FEED_ITEMS + 1}')
+        post.title = 'Renamed post'
+        post.save()
+        response = self.client.get('/blog/feed/atom/')
+        entry = ElementTree.fromstring(response.content).find('atom:entry', namespace)
+        self.assertEqual(entry.findtext('atom:title', namespaces=namespace), 'Renamed post')
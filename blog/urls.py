@@ -3,5 +3,9 @@ from . import views
 
 urlpatterns = [
     path('', views.blog_list, name='blog_list'),
+    path('tag/<slug:tag>/', views.blog_tag, name='blog_tag'),
+    path('autocomplete/', views.blog_autocomplete, name='blog_autocomplete'),
+    path('feed/rss/', views.rss_feed, name='blog_rss_feed'),
+    path('feed/atom/', views.atom_feed, name='blog_atom_feed'),
     path('<slug:slug>/', views.blog_detail, name='blog_detail'),
 ]
@@ -1,29 +1,123 @@
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, get_object_or_404
+from django.urls import reverse
 from django.core.paginator import Paginator
+from core.conditional import conditional_page
+from core.models import Tag
+from core.pagination import InvalidCursor, KeysetPage, KeysetPaginator
+from . import autocomplete, cache, feeds, search
 from .models import BlogPost
 
+def _keyset_page(request, posts, count_key):
+    paginator = KeysetPaginator(
+        posts.filter(published_at__isnull=False).select_related('author'),
+        6,
+        ordering=('-published_at', '-id'),
+        approximate_total=True,
+        count_key=f'{count_key}:{cache.content_version()}',
+    )
+    try:
+        return paginator.page(after=request.GET.get('after'), before=request.GET.get('before'))
+    except InvalidCursor:
+        return paginator.page()
+
+def _post_validators(request, slug):
+    # The page cache pointer already holds the post's stamp; only fall back
+    # to the database when it has expired.
+    stamp = cache.current_stamp(slug)
+    if stamp is None:
+        row = BlogPost.objects.filter(slug=slug, published=True).values_list(
+            'updated_at', 'render_version', 'related_updated_at'
+        ).first()
+        if row is None:
+            return None, None
+        stamp = cache.make_stamp(*row)
+    return [stamp], cache.stamp_time(stamp)
+
+def _blog_validators(request, *args, **kwargs):
+    version = cache.content_version()
+    return [version], cache.stamp_time(version)
+
+@conditional_page(_blog_validators)
 def blog_list(request):
     search_query = request.GET.get('q', '')
-    if search_query:
-        posts = BlogPost.objects.filter(
-            published=True,
-            title__icontains=search_query
-        ) | BlogPost.objects.filter(
-            published=True,
-            content__icontains=search_query
-        )
-    else:
-        posts = BlogPost.objects.filter(published=True).order_by('-published_at')
-    
-    paginator = Paginator(posts, 6)  # 6 posts per page
     page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
+    if search_query and search.is_available():
+        # Rank with the FTS5 index, then load only the posts on this page.
+        paginator = Paginator(search.search(search_query), 6)
+        page_obj = paginator.get_page(page_number)
+        posts = BlogPost.objects.select_related('author').in_bulk(page_obj.object_list)
+        marks = search.highlights(search_query, list(page_obj.object_list))
+        page_obj.object_list = [posts[pk] for pk in page_obj.object_list if pk in posts]
+        for post in page_obj.object_list:
+            post.search_title, post.search_snippet = marks.get(post.pk, (None, None))
+    elif not search_query and page_number is None:
+        # Default listing: cursor pagination, so deep pages cost the same as
+        # the first. Old ?page= links still go through Paginator below.
+        page_obj = _keyset_page(request, BlogPost.objects.filter(published=True), 'blog_list:count')
+    else:
+        if search_query:
+            posts = BlogPost.objects.filter(
+                published=True,
+                title__icontains=search_query
+            ) | BlogPost.objects.filter(
+                published=True,
+                content__icontains=search_query
+            )
+        else:
+            posts = BlogPost.objects.filter(published=True).order_by('-published_at')
+
+        paginator = Paginator(posts.select_related('author'), 6)  # 6 posts per page
+        page_obj = paginator.get_page(page_number)
+
+    return render(request, 'blog_list.html', {
+        'page_obj': page_obj,
+        'search_query': search_query,
+        'keyset': isinstance(page_obj, KeysetPage),
+    })
+
+@conditional_page(_blog_validators)
+def blog_tag(request, tag):
+    tag = get_object_or_404(Tag, slug=tag)
+    page_obj = _keyset_page(
+        request,
+        BlogPost.objects.filter(published=True, tag_index=tag),
+        f'blog_list:count:{tag.slug}',
+    )
     return render(request, 'blog_list.html', {
         'page_obj': page_obj,
-        'search_query': search_query
+        'search_query': '',
+        'current_tag': tag,
+        'keyset': True,
     })
 
+@conditional_page(_post_validators)
 def blog_detail(request, slug):
-    post = get_object_or_404(BlogPost, slug=slug, published=True)
-    return render(request, 'blog_detail.html', {'post': post})
+    content = cache.get_page(request, slug)
+    if content is not None:
+        response = HttpResponse(content)
+        response['X-Cache'] = 'HIT'
+        return response
+
+    post = get_object_or_404(BlogPost.objects.select_related('author'), slug=slug, published=True)
+    related_posts = [link.related for link in post.related_links.select_related('related')]
+    # The page is cached for every visitor, so it must not echo the query string.
+    share_url = cache.site(request) + reverse('blog_detail', args=[post.slug])
+    response = render(request, 'blog_detail.html', {
+        'post': post, 'related_posts': related_posts, 'share_url': share_url,
+    })
+    cache.set_page(request, post, response.content)
+    response['X-Cache'] = 'MISS'
+    return response
+
+def blog_autocomplete(request):
+    query = request.GET.get('q', '')[:100]
+    return JsonResponse({'query': query, 'results': autocomplete.index.get().lookup(query)})
+
+@conditional_page(_blog_validators)
+def rss_feed(request):
+    return feeds.serve(feeds.LatestPostsFeed(), request)
+
+@conditional_page(_blog_validators)
+def atom_feed(request):
+    return feeds.serve(feeds.LatestPostsAtomFeed(), request)
@@ -1,3 +1,112 @@
+import csv
+
 from django.contrib import admin
+from django.contrib.admin import helpers
+from django.http import StreamingHttpResponse
+from django.template.response import TemplateResponse
+
+from core.pagination import CachedCountPaginator
+
+from . import outbox, spam
+from .models import ContactMessage, OutboxMessage
+
+EXPORT_FIELDS = ('id', 'sent_at', 'name', 'email', 'subject', 'message', 'is_read', 'is_spam')
+
+class Echo:
+    """File-like object for ``csv.writer`` that hands back each row instead of storing it."""
+
+    def write(self, value):
+        return value
+
+def _csv_safe(value):
+    # Form input starting with these would run as a formula in a spreadsheet.
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@'):
+        return f"'{value}"
+    return value
+
+@admin.register(ContactMessage)
+class ContactMessageAdmin(admin.ModelAdmin):
+    list_display = ('name', 'email', 'subject', 'sent_at', 'is_read', 'is_spam', 'spam_score')
+    list_filter = ('is_read', ('sent_at', admin.DateFieldListFilter), 'is_spam')
+    search_fields = ('name', 'email', 'subject')
+    ordering = ('-sent_at',)
+    list_per_page = 50
+    # The inbox can be large: skip the unfiltered COUNT(*) and cache the
+    # filtered one.
+    show_full_result_count = False
+    paginator = CachedCountPaginator
+    actions = ['mark_read', 'mark_unread', 'delete_messages', 'export_csv', 'mark_spam', 'mark_not_spam']
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # Replaced by delete_messages, which does not load every row first.
+        actions.pop('delete_selected', None)
+        return actions
+
+    @admin.action(description='Mark selected messages as read', permissions=['change'])
+    def mark_read(self, request, queryset):
+        count = queryset.update(is_read=True)
+        self.message_user(request, f'{count} message(s) marked as read.')
+
+    @admin.action(description='Mark selected messages as unread', permissions=['change'])
+    def mark_unread(self, request, queryset):
+        count = queryset.update(is_read=False)
+        self.message_user(request, f'{count} message(s) marked as unread.')
+
+    @admin.action(description='Delete selected messages', permissions=['delete'])
+    def delete_messages(self, request, queryset):
+        if request.POST.get('post') != 'yes':
+            # Confirm first, like delete_selected, but with a count instead
+            # of a listing of every row that would be deleted.
+            return TemplateResponse(request, 'admin/contact/contactmessage/delete_messages.html', {
+                **self.admin_site.each_context(request),
+                'opts': self.model._meta,
+                'title': 'Are you sure?',
+                'count': queryset.count(),
+                'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+                'select_across': request.POST.get('select_across', '0'),
+                'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+            })
+        count, _ = queryset.delete()
+        self.message_user(request, f'{count} message(s) deleted.')
+
+    @admin.action(description='Export selected messages as CSV', permissions=['view'])
+    def export_csv(self, request, queryset):
+        writer = csv.writer(Echo())
+        rows = queryset.order_by('-sent_at', '-id').values_list(*EXPORT_FIELDS).iterator(chunk_size=2000)
+
+        def stream():
+            yield writer.writerow(EXPORT_FIELDS)
+            for row in rows:
+                yield writer.writerow([_csv_safe(value) for value in row])
+
+        response = StreamingHttpResponse(stream(), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="contact-messages.csv"'
+        return response
+
+    @admin.action(description='Mark selected messages as spam', permissions=['change'])
+    def mark_spam(self, request, queryset):
+        count = spam.mark(queryset, True)
+        self.message_user(request, f'{count} message(s) marked as spam.')
+
+    @admin.action(description='Not spam: release selected messages', permissions=['change'])
+    def mark_not_spam(self, request, queryset):
+        count = spam.mark(queryset, False)
+        self.message_user(request, f'{count} message(s) released; notifications queued for quarantined ones.')
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'kind', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('subject', 'reply_to')
+    readonly_fields = ('kind', 'digest', 'subject', 'body', 'from_email', 'recipients', 'reply_to', 'status',
+                       'attempts', 'next_attempt_at', 'last_error', 'created_at', 'sent_at')
+    actions = ['requeue_messages']
+
+    def has_add_permission(self, request):
+        return False
 
-# Register your models here.
+    @admin.action(description='Requeue selected messages')
+    def requeue_messages(self, request, queryset):
+        count = outbox.requeue(queryset)
+        self.message_user(request, f'{count} message(s) queued again.')
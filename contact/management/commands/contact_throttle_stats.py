@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from contact import throttle
+
+
+class Command(BaseCommand):
+    help = 'Show how many contact form submissions were rate limited, deduplicated or quarantined.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing them.')
+
+    def handle(self, *args, **options):
+        stats = throttle.shed.totals()
+        self.stdout.write(
+            f"shed by IP: {stats['ip']}  shed by email: {stats['email']}  "
+            f"duplicates: {stats['duplicate']}  quarantined as spam: {stats['spam']}"
+        )
+        if options['reset']:
+            throttle.shed.reset()
+            self.stdout.write('Counters reset.')
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from contact import outbox
+
+
+class Command(BaseCommand):
+    help = 'Send queued contact notification emails, retrying failures with backoff.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll for new messages.')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between polls with --loop.')
+
+    def handle(self, *args, **options):
+        with outbox.EmailDispatcher() as dispatcher:
+            while True:
+                sent, failed = outbox.drain(dispatcher=dispatcher)
+                if sent or failed or not options['loop']:
+                    self.stdout.write(f'Sent {sent} email(s), {failed} failed.')
+                if not options['loop']:
+                    return
+                if not sent and not failed:
+                    # Nothing to send; do not hold the SMTP session open.
+                    dispatcher.close()
+                time.sleep(options['interval'])
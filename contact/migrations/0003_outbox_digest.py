@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0002_outboxmessage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='digest',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='rolled_up', to='contact.outboxmessage'),
+        ),
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='kind',
+            field=models.CharField(choices=[('notification', 'Notification'), ('digest', 'Digest')], default='notification', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='outboxmessage',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('dead', 'Dead letter'), ('rolled_up', 'Rolled into digest')], default='pending', max_length=10),
+        ),
+    ]
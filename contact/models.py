@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 class ContactMessage(models.Model):
     name = models.CharField(max_length=100)
@@ -7,6 +8,66 @@ class ContactMessage(models.Model):
     message = models.TextField()
     sent_at = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
+    is_spam = models.BooleanField(default=False)
+    spam_score = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Inbox order and the read/unread filter in the admin.
+            models.Index(fields=['-sent_at', '-id'], name='contact_message_recent_idx'),
+            models.Index(fields=['is_read', '-sent_at', '-id'], name='contact_message_read_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.subject}"
+
+class OutboxMessage(models.Model):
+    """An email waiting to be sent by ``manage.py send_outbox``, see ``contact.outbox``."""
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    DEAD = 'dead'
+    ROLLED_UP = 'rolled_up'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+        (DEAD, 'Dead letter'),
+        (ROLLED_UP, 'Rolled into digest'),
+    ]
+    NOTIFICATION = 'notification'
+    DIGEST = 'digest'
+    KIND_CHOICES = [
+        (NOTIFICATION, 'Notification'),
+        (DIGEST, 'Digest'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default=NOTIFICATION)
+    digest = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='rolled_up')
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list)
+    reply_to = models.CharField(max_length=254, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='contact_outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} ({self.status})"
+
+class SubmissionFingerprint(models.Model):
+    """A recently received contact form message, for dropping resubmissions; see ``contact.spam``."""
+    digest = models.CharField(max_length=64, unique=True)
+    seen_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return self.digest
@@ -0,0 +1,264 @@
+"""
+Transactional outbox for contact notifications.
+
+The contact view writes an ``OutboxMessage`` in the same transaction as the
+``ContactMessage``. The POST therefore never waits on SMTP, and a notification
+exists if and only if its message was stored. ``manage.py send_outbox`` drains
+due rows. A failed send is retried with exponential backoff plus jitter.
+After ``MAX_ATTEMPTS`` the row is moved to the dead-letter status, where it
+stays visible in the admin until requeued.
+
+A drain sends its rows through one ``EmailDispatcher``, so a batch costs one
+SMTP connect and login rather than one per message.
+
+With ``CONTACT_DIGEST_INTERVAL`` set (in seconds), notifications are not sent
+one by one. At most once per interval, the pending ones are rolled into a
+single digest row, which is then sent and retried like any other row.
+"""
+import random
+import smtplib
+import time
+from contextlib import suppress
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+MAX_ATTEMPTS = 6
+RETRY_BASE_SECONDS = 60
+RETRY_MAX_SECONDS = 60 * 60 * 6
+# Rows left in "sending" this long are assumed orphaned by a crashed sender.
+STALE_AFTER = timedelta(minutes=10)
+BATCH_SIZE = 50
+# A connection is replaced after this many messages or seconds of idling,
+# before the server drops it on its own.
+MESSAGES_PER_CONNECTION = 100
+CONNECTION_MAX_IDLE = 60
+DIGEST_MAX_MESSAGES = 200
+
+# Errors meaning the server went away; the send is retried once on a fresh
+# connection.
+_RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError)
+
+
+def digest_interval():
+    return getattr(settings, 'CONTACT_DIGEST_INTERVAL', None)
+
+
+def queue_notification(contact_message):
+    return OutboxMessage.objects.create(
+        subject=f'Contact Form: {contact_message.subject}',
+        body=(
+            f'Name: {contact_message.name}\n'
+            f'Email: {contact_message.email}\n\n'
+            f'Message:\n{contact_message.message}'
+        ),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipients=[settings.DEFAULT_FROM_EMAIL],
+        reply_to=contact_message.email,
+    )
+
+
+def retry_delay(attempts):
+    """Backoff before the next try after ``attempts`` failures, with jitter."""
+    delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def requeue_stale():
+    cutoff = timezone.now() - STALE_AFTER
+    return OutboxMessage.objects.filter(status=OutboxMessage.SENDING, next_attempt_at__lt=cutoff).update(
+        status=OutboxMessage.PENDING
+    )
+
+
+def claim(limit=BATCH_SIZE):
+    """Mark up to ``limit`` due rows as sending and return them."""
+    now = timezone.now()
+    due = OutboxMessage.objects.filter(status=OutboxMessage.PENDING, next_attempt_at__lte=now)
+    if digest_interval():
+        # Notifications wait for the next digest instead.
+        due = due.exclude(kind=OutboxMessage.NOTIFICATION)
+    due = due.order_by('next_attempt_at', 'id').values_list('pk', flat=True)[:limit]
+    claimed = []
+    for pk in list(due):
+        # The status check makes the claim safe against a second sender.
+        if OutboxMessage.objects.filter(pk=pk, status=OutboxMessage.PENDING).update(
+            status=OutboxMessage.SENDING, next_attempt_at=now
+        ):
+            claimed.append(pk)
+    return list(OutboxMessage.objects.filter(pk__in=claimed).order_by('id'))
+
+
+def to_email(row, connection=None):
+    return EmailMessage(
+        row.subject,
+        row.body,
+        row.from_email,
+        row.recipients,
+        reply_to=[row.reply_to] if row.reply_to else None,
+        connection=connection,
+    )
+
+
+def mark_sent(row):
+    OutboxMessage.objects.filter(pk=row.pk).update(
+        status=OutboxMessage.SENT, attempts=row.attempts + 1, sent_at=timezone.now(), last_error=''
+    )
+
+
+def mark_failed(row, error):
+    attempts = row.attempts + 1
+    if attempts >= MAX_ATTEMPTS:
+        update = {'status': OutboxMessage.DEAD}
+    else:
+        update = {'status': OutboxMessage.PENDING, 'next_attempt_at': timezone.now() + retry_delay(attempts)}
+    OutboxMessage.objects.filter(pk=row.pk).update(attempts=attempts, last_error=repr(error)[:2000], **update)
+
+
+class EmailDispatcher:
+    """
+    Send messages over one reused mail connection.
+
+    The connection is opened on first use and kept for later messages. It is
+    replaced after ``max_messages`` sends or ``max_idle`` seconds without one,
+    and after any failed send, so a broken session is never reused. A send
+    that fails because the server hung up is retried once on a new connection.
+    """
+
+    def __init__(self, max_messages=MESSAGES_PER_CONNECTION, max_idle=CONNECTION_MAX_IDLE):
+        self.max_messages = max_messages
+        self.max_idle = max_idle
+        self.connection = None
+        self.connections_opened = 0
+        self._sent = 0
+        self._last_used = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _ready(self):
+        if self.connection is not None and (
+            self._sent >= self.max_messages or time.monotonic() - self._last_used > self.max_idle
+        ):
+            self.close()
+        if self.connection is None:
+            connection = get_connection()
+            connection.open()
+            self.connection = connection
+            self.connections_opened += 1
+            self._sent = 0
+        return self.connection
+
+    def send(self, email):
+        try:
+            try:
+                self._ready().send_messages([email])
+            except _RECONNECT_ERRORS:
+                self.close()
+                self._ready().send_messages([email])
+        except Exception:
+            self.close()
+            raise
+        self._sent += 1
+        self._last_used = time.monotonic()
+
+    def close(self):
+        if self.connection is not None:
+            connection, self.connection = self.connection, None
+            with suppress(OSError, smtplib.SMTPException):
+                connection.close()
+
+
+def deliver(rows, dispatcher=None):
+    """Send ``rows`` over one connection; return ``(sent, failed)``."""
+    if dispatcher is None:
+        with EmailDispatcher() as dispatcher:
+            return deliver(rows, dispatcher)
+    sent = failed = 0
+    for row in rows:
+        try:
+            dispatcher.send(to_email(row))
+        except Exception as error:
+            mark_failed(row, error)
+            failed += 1
+        else:
+            mark_sent(row)
+            sent += 1
+    return sent, failed
+
+
+def _digest_body(rows):
+    sections = [f'{len(rows)} new contact message(s).']
+    for row in rows:
+        sections.append(
+            f'--- {timezone.localtime(row.created_at):%Y-%m-%d %H:%M} | {row.subject}\n'
+            f'Reply to: {row.reply_to or "-"}\n\n{row.body}'
+        )
+    return '\n\n'.join(sections)
+
+
+def roll_up_digest():
+    """
+    Fold pending notifications into one digest row, at most once per
+    ``CONTACT_DIGEST_INTERVAL``. Return the digest, or ``None``.
+    """
+    interval = digest_interval()
+    if not interval:
+        return None
+    digests = OutboxMessage.objects.filter(kind=OutboxMessage.DIGEST)
+    last = digests.order_by('-created_at').values_list('created_at', flat=True).first()
+    if last and timezone.now() - last < timedelta(seconds=interval):
+        return None
+    pending = OutboxMessage.objects.filter(kind=OutboxMessage.NOTIFICATION, status=OutboxMessage.PENDING)
+    pks = list(pending.order_by('id').values_list('pk', flat=True)[:DIGEST_MAX_MESSAGES])
+    if not pks:
+        return None
+    with transaction.atomic():
+        digest = OutboxMessage.objects.create(
+            kind=OutboxMessage.DIGEST,
+            subject='Contact Form: digest',
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipients=[settings.DEFAULT_FROM_EMAIL],
+        )
+        # Only rows still pending are taken, so a row claimed by another
+        # sender in the meantime is not mailed twice.
+        pending.filter(pk__in=pks).update(status=OutboxMessage.ROLLED_UP, digest=digest)
+        rows = list(digest.rolled_up.order_by('id'))
+        if not rows:
+            digest.delete()
+            return None
+        digest.subject = f'Contact Form: {len(rows)} new message(s)'
+        digest.body = _digest_body(rows)
+        digest.save(update_fields=['subject', 'body'])
+    return digest
+
+
+def drain(limit=BATCH_SIZE, dispatcher=None):
+    """Send every due row, ``limit`` at a time; return ``(sent, failed)``."""
+    if dispatcher is None:
+        with EmailDispatcher() as dispatcher:
+            return drain(limit, dispatcher)
+    requeue_stale()
+    roll_up_digest()
+    sent = failed = 0
+    while True:
+        rows = claim(limit)
+        if not rows:
+            return sent, failed
+        batch_sent, batch_failed = deliver(rows, dispatcher)
+        sent += batch_sent
+        failed += batch_failed
+
+
+def requeue(queryset):
+    return queryset.exclude(status__in=[OutboxMessage.SENT, OutboxMessage.ROLLED_UP]).update(
+        status=OutboxMessage.PENDING, attempts=0, next_attempt_at=timezone.now(), last_error=''
+    )
@@ -0,0 +1,142 @@
+"""
+Duplicate and spam filtering for contact form submissions.
+
+Duplicates: each submission is reduced to a fingerprint, a hash of its
+normalized name, email, subject and message. The first copy claims it by
+inserting a ``SubmissionFingerprint`` row. The digest is unique, so of two
+concurrent copies exactly one insert succeeds. Identical copies inside
+``DEDUP_WINDOW`` are answered as if they had been sent, but they are never
+stored or mailed. Keeping fingerprints in the database rather than the cache
+also means a burst of distinct messages cannot push throttle buckets and
+version keys out of the size-capped cache.
+
+Spam: a multinomial naive Bayes model trained on the ``ContactMessage``
+history, where ``is_spam`` is the label. Words from the subject and message,
+plus the sender's domain, are hashed into ``N_FEATURES`` buckets. Training
+therefore reduces to two ``bincount`` calls, and the model is one array of
+per-bucket log-likelihood ratios. Scoring a message is a hash per token and a
+single array sum, well under a millisecond.
+
+Messages scoring at least ``SPAM_THRESHOLD`` are stored with ``is_spam`` set
+and no notification is queued. The model is held in an in-process
+``Snapshot``. ``mark()`` changes labels and bumps its version, so each worker
+retrains once after a message is reviewed. Until both classes have
+``MIN_EXAMPLES`` messages, nothing is scored.
+"""
+import hashlib
+import math
+import re
+import zlib
+
+from datetime import timedelta
+
+import numpy as np
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from core.snapshots import Snapshot
+
+from . import outbox
+from .models import ContactMessage, SubmissionFingerprint
+
+DEDUP_WINDOW = 60 * 60 * 24
+N_FEATURES = 2 ** 16
+SPAM_THRESHOLD = 0.9
+MIN_EXAMPLES = 10
+# Only the most recent messages are used for training.
+TRAINING_LIMIT = 5000
+SMOOTHING = 1.0
+
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9'$]+")
+_SPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(name, email, subject, message):
+    normalized = '\x1f'.join(
+        _SPACE_RE.sub(' ', value or '').strip().lower() for value in (name, email, subject, message)
+    )
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def first_seen(digest):
+    """Claim a fingerprint; ``False`` means the same message arrived recently."""
+    # Expired claims, this one's included, go first; the range is indexed.
+    SubmissionFingerprint.objects.filter(seen_at__lt=timezone.now() - timedelta(seconds=DEDUP_WINDOW)).delete()
+    try:
+        with transaction.atomic():
+            SubmissionFingerprint.objects.create(digest=digest)
+    except IntegrityError:
+        return False
+    return True
+
+
+def forget(digest):
+    SubmissionFingerprint.objects.filter(digest=digest).delete()
+
+
+def features(email, subject, message):
+    """Hashed feature indices of a message, one per token occurrence."""
+    tokens = _WORD_RE.findall(f'{subject or ""}\n{message or ""}'.lower())
+    domain = (email or '').rpartition('@')[2].strip().lower()
+    if domain:
+        tokens.append(f'@{domain}')
+    return np.fromiter(
+        (zlib.crc32(token.encode()) & (N_FEATURES - 1) for token in tokens), dtype=np.int64, count=len(tokens)
+    )
+
+
+class SpamModel:
+    def __init__(self, spam_features, ham_features, spam_count, ham_count):
+        spam = np.bincount(spam_features, minlength=N_FEATURES) + SMOOTHING
+        ham = np.bincount(ham_features, minlength=N_FEATURES) + SMOOTHING
+        self.weights = (np.log(spam / spam.sum()) - np.log(ham / ham.sum())).astype(np.float32)
+        self.prior = math.log(spam_count / ham_count)
+
+    def probability(self, email, subject, message):
+        score = self.prior + float(self.weights[features(email, subject, message)].sum())
+        if score >= 0:
+            return 1 / (1 + math.exp(-score))
+        return math.exp(score) / (1 + math.exp(score))
+
+
+def build_model():
+    rows = ContactMessage.objects.order_by('-id').values_list('is_spam', 'email', 'subject', 'message')
+    collected = {True: [], False: []}
+    for is_spam, email, subject, message in rows[:TRAINING_LIMIT].iterator():
+        collected[is_spam].append(features(email, subject, message))
+    if len(collected[True]) < MIN_EXAMPLES or len(collected[False]) < MIN_EXAMPLES:
+        return None
+    return SpamModel(
+        np.concatenate(collected[True]),
+        np.concatenate(collected[False]),
+        len(collected[True]),
+        len(collected[False]),
+    )
+
+
+model = Snapshot('contact:spam', build_model)
+
+
+def score(email, subject, message):
+    """Spam probability for a submission, or ``None`` while there is no model."""
+    current = model.get()
+    if current is None:
+        return None
+    return current.probability(email, subject, message)
+
+
+def mark(queryset, is_spam):
+    """
+    Label messages and retrain. Messages released from quarantine get the
+    notification they were held back from.
+    """
+    with transaction.atomic():
+        released = []
+        if not is_spam:
+            released = list(queryset.filter(is_spam=True))
+        count = queryset.exclude(is_spam=is_spam).update(is_spam=is_spam)
+        for message in released:
+            outbox.queue_notification(message)
+    if count:
+        model.invalidate()
+    return count
@@ -1,3 +1,298 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.core import mail
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.core.mail.backends import locmem
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.testing import TEST_CACHES
+
+from . import admin, outbox, spam, throttle
+from .models import ContactMessage, OutboxMessage, SubmissionFingerprint
+
+FORM = {'name': 'Asha', 'email': 'asha@example.com', 'subject': 'Website', 'message': 'Can you build one?'}
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionRefusedError('SMTP server unavailable')
+
+class CountingBackend(locmem.EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+@override_settings(CACHES=TEST_CACHES)
+class OutboxTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_queues_notification_without_sending(self):
+        response = self.client.post('/contact/', FORM)
+        self.assertRedirects(response, '/contact/')
+        self.assertEqual(len(mail.outbox), 0)
+        row = OutboxMessage.objects.get()
+        self.assertEqual(row.status, OutboxMessage.PENDING)
+        self.assertEqual(row.reply_to, 'asha@example.com')
+        self.assertEqual(ContactMessage.objects.count(), 1)
+
+        self.assertEqual(outbox.drain(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Contact Form: Website')
+        self.assertEqual(mail.outbox[0].reply_to, ['asha@example.com'])
+        row.refresh_from_db()
+        self.assertEqual(row.status, OutboxMessage.SENT)
+        self.assertEqual(outbox.drain(), (0, 0))
+
+    @override_settings(EMAIL_BACKEND='contact.tests.FailingBackend')
+    def test_failures_back_off_then_dead_letter(self):
+        self.client.post('/contact/', FORM)
+        self.assertEqual(outbox.drain(), (0, 1))
+        row = OutboxMessage.objects.get()
+        self.assertEqual((row.status, row.attempts), (OutboxMessage.PENDING, 1))
+        self.assertIn('SMTP server unavailable', row.last_error)
+        self.assertGreater(row.next_attempt_at, timezone.now())
+        # Not due yet.
+        self.assertEqual(outbox.drain(), (0, 0))
+
+        for attempt in range(2, outbox.MAX_ATTEMPTS + 1):
+            OutboxMessage.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+            outbox.drain()
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), (OutboxMessage.DEAD, outbox.MAX_ATTEMPTS))
+
+        outbox.requeue(OutboxMessage.objects.all())
+        with self.settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+            self.assertEqual(outbox.drain(), (1, 0))
+
+    def test_stale_sending_rows_are_requeued(self):
+        self.client.post('/contact/', FORM)
+        OutboxMessage.objects.update(
+            status=OutboxMessage.SENDING, next_attempt_at=timezone.now() - outbox.STALE_AFTER * 2
+        )
+        self.assertEqual(outbox.drain(), (1, 0))
+
+    @override_settings(EMAIL_BACKEND='contact.tests.CountingBackend')
+    def test_batch_shares_one_connection(self):
+        CountingBackend.opened = 0
+        for number in range(5):
+            self.client.post('/contact/', dict(FORM, subject=f'Website {number}', email=f'a{number}@example.com'))
+        self.assertEqual(outbox.drain(), (5, 0))
+        self.assertEqual(CountingBackend.opened, 1)
+
+    @override_settings(CONTACT_DIGEST_INTERVAL=3600)
+    def test_digest_rolls_up_notifications(self):
+        for number in range(3):
+            self.client.post('/contact/', dict(FORM, subject=f'Website {number}', email=f'a{number}@example.com'))
+        self.assertEqual(outbox.drain(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Contact Form: 3 new message(s)')
+        self.assertIn('Website 2', mail.outbox[0].body)
+        self.assertEqual(OutboxMessage.objects.filter(status=OutboxMessage.ROLLED_UP).count(), 3)
+
+        # The next digest waits for the interval to pass.
+        self.client.post('/contact/', dict(FORM, email='late@example.com'))
+        self.assertEqual(outbox.drain(), (0, 0))
+        OutboxMessage.objects.filter(kind=OutboxMessage.DIGEST).update(
+            created_at=timezone.now() - timedelta(hours=2)
+        )
+        self.assertEqual(outbox.drain(), (1, 0))
+        self.assertEqual(mail.outbox[1].subject, 'Contact Form: 1 new message(s)')
+
+@override_settings(CACHES=TEST_CACHES)
+class ThrottleTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        throttle.shed.reset()
+
+    def test_ip_bucket_sheds_before_database_work(self):
+        for number in range(throttle.per_ip.capacity):
+            response = self.client.post('/contact/', dict(FORM, email=f'a{number}@example.com'))
+            self.assertEqual(response.status_code, 302)
+        with self.assertNumQueries(0):
+            response = self.client.post('/contact/', dict(FORM, email='new@example.com'))
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(ContactMessage.objects.count(), throttle.per_ip.capacity)
+        # Other clients are unaffected.
+        response = self.client.post('/contact/', dict(FORM, email='new@example.com'), REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual((throttle.shed.totals()['ip'], throttle.shed.totals()['email']), (1, 0))
+
+    def test_email_bucket_spans_addresses(self):
+        for number in range(throttle.per_email.capacity):
+            self.client.post('/contact/', FORM, REMOTE_ADDR=f'10.0.1.{number}')
+        response = self.client.post('/contact/', dict(FORM, email=' Asha@Example.com'), REMOTE_ADDR='10.0.2.1')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(throttle.shed.totals()['email'], 1)
+
+    def test_forwarded_for_is_trusted_only_when_configured(self):
+        sent = iter(range(100))
+
+        def post(forwarded_for):
+            return self.client.post(
+                '/contact/', dict(FORM, email=f'visitor{next(sent)}@example.com'),
+                REMOTE_ADDR='10.9.9.9', HTTP_X_FORWARDED_FOR=forwarded_for,
+            )
+
+        # Without the setting the header is ignored and the router's address is the bucket.
+        for number in range(throttle.per_ip.capacity):
+            post(f'203.0.113.{number}')
+        self.assertEqual(post('203.0.113.99').status_code, 429)
+
+        cache.clear()
+        with self.settings(THROTTLE_TRUSTED_PROXY_COUNT=1):
+            for number in range(throttle.per_ip.capacity):
+                self.assertEqual(post(f'203.0.113.{number}').status_code, 302)
+            # Only the address the router saw counts, not what the client claims.
+            for number in range(throttle.per_ip.capacity):
+                self.assertEqual(post(f'198.51.100.{number}, 203.0.113.50').status_code, 302)
+            self.assertEqual(post('198.51.100.99, 203.0.113.50').status_code, 429)
+            # A request that did not pass through the router falls back to REMOTE_ADDR.
+            request = RequestFactory().post('/contact/', REMOTE_ADDR='10.9.9.9')
+            self.assertEqual(throttle.client_ip(request), '10.9.9.9')
+
+@override_settings(CACHES=TEST_CACHES)
+class SpamTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_resubmission_is_dropped(self):
+        self.client.post('/contact/', FORM)
+        response = self.client.post('/contact/', dict(FORM, message='  can you BUILD one? '), REMOTE_ADDR='10.0.0.2')
+        self.assertRedirects(response, '/contact/')
+        self.assertEqual(ContactMessage.objects.count(), 1)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+    def test_fingerprint_claims_are_atomic_rows(self):
+        digest = spam.fingerprint('Asha', 'asha@example.com', 'Website', 'Hello')
+        self.assertTrue(spam.first_seen(digest))
+        self.assertFalse(spam.first_seen(digest))
+        self.assertEqual(SubmissionFingerprint.objects.count(), 1)
+        self.assertIsNone(cache.get(digest))
+
+        spam.forget(digest)
+        self.assertTrue(spam.first_seen(digest))
+        SubmissionFingerprint.objects.update(seen_at=timezone.now() - timedelta(seconds=spam.DEDUP_WINDOW + 1))
+        other = spam.fingerprint('Ravi', 'ravi@example.com', 'Website', 'Hello')
+        self.assertTrue(spam.first_seen(other))
+        # Expired claims are cleared by later submissions.
+        self.assertEqual(list(SubmissionFingerprint.objects.values_list('digest', flat=True)), [other])
+        self.assertTrue(spam.first_seen(digest))
+
+    def test_spam_is_quarantined_until_released(self):
+        for number in range(spam.MIN_EXAMPLES):
+            ContactMessage.objects.create(
+                name='Bot', email=f'bot{number}@spam.test', subject='Cheap SEO backlinks',
+                message=f'Buy cheap backlinks and crypto casino traffic now {number}', is_spam=True,
+            )
+            ContactMessage.objects.create(
+                name='Client', email=f'client{number}@example.com', subject='Website project',
+                message=f'We would like a Django website for our clinic, project {number}',
+            )
+        self.client.post('/contact/', dict(
+            FORM, email='bot@spam.test', subject='SEO backlinks', message='Cheap casino backlinks and traffic',
+        ))
+        self.client.post('/contact/', dict(FORM, email='new@example.com'), REMOTE_ADDR='10.0.0.2')
+        quarantined = ContactMessage.objects.get(email='bot@spam.test')
+        self.assertTrue(quarantined.is_spam)
+        self.assertGreater(quarantined.spam_score, spam.SPAM_THRESHOLD)
+        self.assertFalse(ContactMessage.objects.get(email='new@example.com').is_spam)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+        self.assertEqual(spam.mark(ContactMessage.objects.filter(pk=quarantined.pk), False), 1)
+        self.assertEqual(OutboxMessage.objects.count(), 2)
+
+@override_settings(CACHES=TEST_CACHES)
+class InboxAdminTests(TestCase):
+    changelist = '/admin/contact/contactmessage/'
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        ContactMessage.objects.bulk_create(
+            ContactMessage(name=f'Sender {number}', email=f's{number}@example.com', subject='Hello',
+                           message='=HYPERLINK("x")' if number == 0 else 'Hi')
+            for number in range(30)
+        )
+
+    def run_action(self, action, **extra):
+        return self.client.post(self.changelist, {
+            'action': action, 'select_across': '1', 'index': '0',
+            '_selected_action': ContactMessage.objects.values_list('pk', flat=True)[:1], **extra,
+        })
+
+    def test_changelist_filters_on_read_state(self):
+        response = self.client.get(self.changelist, {'is_read__exact': '0'})
+        self.assertContains(response, 'Sender 29')
+
+    def test_bulk_actions_are_single_statements(self):
+        with CaptureQueriesContext(connection) as context:
+            self.run_action('mark_read')
+        self.assertEqual(len([sql for sql in context.captured_queries if sql['sql'].startswith('UPDATE')]), 1)
+        self.assertFalse(ContactMessage.objects.filter(is_read=False).exists())
+
+        with CaptureQueriesContext(connection) as context:
+            self.run_action('delete_messages', post='yes')
+        deletes = [sql for sql in context.captured_queries if sql['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 1)
+        self.assertFalse(ContactMessage.objects.exists())
+
+    def test_delete_asks_for_confirmation(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.run_action('delete_messages')
+        self.assertContains(response, 'delete 30 messages?')
+        # A count, not the rows: delete_selected would load every message.
+        self.assertFalse([sql for sql in context.captured_queries if '"message"' in sql['sql']])
+        self.assertEqual(ContactMessage.objects.count(), 30)
+
+        # Only the ticked rows, carried through the confirmation form.
+        picked = list(ContactMessage.objects.values_list('pk', flat=True)[:2])
+        response = self.client.post(self.changelist, {
+            'action': 'delete_messages', 'index': '0', '_selected_action': picked,
+        })
+        self.assertContains(response, 'delete 2 messages?')
+        response = self.client.post(self.changelist, {
+            'action': 'delete_messages', 'index': '0', 'post': 'yes',
+            'select_across': response.context['select_across'], '_selected_action': response.context['selected'],
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(ContactMessage.objects.count(), 28)
+        self.assertFalse(ContactMessage.objects.filter(pk__in=picked).exists())
+
+    def test_csv_export_streams_rows(self):
+        response = self.run_action('export_csv')
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], ','.join(admin.EXPORT_FIELDS))
+        self.assertEqual(len(lines), 31)
+        self.assertIn('\'=HYPERLINK', lines[-1])
+
+    def login_viewer(self):
+        viewer = User.objects.create_user('viewer', 'viewer@example.com', 'password', is_staff=True)
+        viewer.user_permissions.add(Permission.objects.get(codename='view_contactmessage'))
+        self.client.force_login(viewer)
+        return dict(self.client.get(self.changelist).context['action_form'].fields['action'].choices)
+
+    def test_view_only_staff_cannot_relabel_spam(self):
+        actions = self.login_viewer()
+        self.assertNotIn('mark_spam', actions)
+        self.assertNotIn('mark_not_spam', actions)
+        for action in ('mark_spam', 'mark_not_spam'):
+            self.run_action(action)
+        self.assertFalse(ContactMessage.objects.filter(is_spam=True).exists())
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_view_only_staff_can_export(self):
+        self.assertEqual(set(self.login_viewer()) - {''}, {'export_csv'})
+        response = self.run_action('export_csv')
+        self.assertEqual(len(b''.join(response.streaming_content).decode().splitlines()), 31)
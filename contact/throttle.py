@@ -0,0 +1,93 @@
+"""
+Token-bucket throttling for contact form submissions.
+
+Each client IP and each sender address gets a bucket of ``capacity`` tokens
+that refills one token every ``refill_seconds``. A submission takes one token
+from each bucket, and an empty bucket rejects it. The view checks the buckets
+before touching the database, so a flood costs only cache reads.
+
+Buckets live in the default cache, which every gunicorn worker shares. Taking
+a token is a read followed by a write, not an atomic operation, so concurrent
+requests can occasionally let an extra submission through. That is fine for
+keeping a bot from tying up the workers.
+
+Behind a reverse proxy every request comes from the proxy's address. Set
+``THROTTLE_TRUSTED_PROXY_COUNT`` to the number of proxies in front of the app
+and the client address is read from ``X-Forwarded-For`` instead; the header is
+ignored otherwise, since clients can send anything in it.
+
+``shed`` counts rejected submissions (including the duplicates and spam
+caught by ``contact.spam``); ``manage.py contact_throttle_stats`` prints them.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.counters import Counters
+
+shed = Counters({
+    'ip': 'contact:throttle:shed:ip',
+    'email': 'contact:throttle:shed:email',
+    'duplicate': 'contact:throttle:shed:duplicate',
+    'spam': 'contact:throttle:shed:spam',
+})
+
+
+class TokenBucket:
+    def __init__(self, scope, capacity, refill_seconds):
+        self.scope = scope
+        self.capacity = capacity
+        self.refill_seconds = refill_seconds
+
+    def _key(self, identity):
+        digest = hashlib.sha1(identity.encode()).hexdigest()[:20]
+        return f'contact:throttle:{self.scope}:{digest}'
+
+    def take(self, identity):
+        """
+        Take a token for ``identity``. Return 0 when one was available,
+        otherwise the seconds until the next one.
+        """
+        key = self._key(identity)
+        now = time.time()
+        tokens, updated = cache.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) / self.refill_seconds)
+        if tokens < 1:
+            return (1 - tokens) * self.refill_seconds
+        # An entry that has expired is a full bucket, so it need not outlive
+        # the time it takes to refill.
+        cache.set(key, (tokens - 1, now), int(self.capacity * self.refill_seconds) + 1)
+        return 0
+
+
+per_ip = TokenBucket('ip', capacity=5, refill_seconds=60)
+per_email = TokenBucket('email', capacity=3, refill_seconds=60 * 10)
+
+
+def client_ip(request):
+    proxies = getattr(settings, 'THROTTLE_TRUSTED_PROXY_COUNT', 0)
+    if proxies:
+        # Each trusted proxy appends the address it received the request
+        # from; anything further left was supplied by the client.
+        forwarded = [part.strip() for part in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')]
+        forwarded = [part for part in forwarded if part]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR') or 'unknown'
+
+
+def check(request):
+    """Return 0 if ``request`` may submit, otherwise seconds to wait."""
+    wait = per_ip.take(client_ip(request))
+    if wait:
+        shed.record('ip')
+        return wait
+    email = (request.POST.get('email') or '').strip().lower()
+    if email:
+        wait = per_email.take(email)
+        if wait:
+            shed.record('email')
+    return wait
+
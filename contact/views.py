@@ -1,36 +1,60 @@
+import math
+
+from django.http import HttpResponse
 from django.shortcuts import render, redirect
-from django.core.mail import send_mail
-from django.conf import settings
 from django.contrib import messages
+from django.db import transaction
+from . import outbox, spam, throttle
 from .models import ContactMessage
 
 def contact(request):
     if request.method == 'POST':
+        # Checked before anything touches the session or the database.
+        wait = throttle.check(request)
+        if wait:
+            response = HttpResponse(
+                'Too many messages. Please try again later.', status=429, content_type='text/plain'
+            )
+            response['Retry-After'] = str(math.ceil(wait))
+            return response
+
         name = request.POST.get('name')
         email = request.POST.get('email')
         subject = request.POST.get('subject')
         message = request.POST.get('message')
-        
-        # Save to database
-        contact_msg = ContactMessage.objects.create(
-            name=name,
-            email=email,
-            subject=subject,
-            message=message
-        )
-        
-        # Send email
-        try:
-            send_mail(
-                f'Contact Form: {subject}',
-                f'Name: {name}\nEmail: {email}\n\nMessage:\n{message}',
-                settings.DEFAULT_FROM_EMAIL,
-                [settings.DEFAULT_FROM_EMAIL],  # Send to admin
-                fail_silently=False,
-            )
+
+        # A resubmission of a message received recently is answered as if it
+        # was sent, without storing or mailing it again.
+        fingerprint = spam.fingerprint(name, email, subject, message)
+        if not spam.first_seen(fingerprint):
+            throttle.shed.record('duplicate')
             messages.success(request, 'Your message has been sent successfully!')
-        except Exception as e:
-            messages.error(request, 'There was an error sending your message. Please try again.')
+            return redirect('contact')
+
+        spam_score = spam.score(email, subject, message)
+        is_spam = spam_score is not None and spam_score >= spam.SPAM_THRESHOLD
+
+        # Save the message and its notification together; the email itself
+        # is sent by the outbox worker (manage.py send_outbox). Messages that
+        # look like spam are kept for review without a notification.
+        try:
+            with transaction.atomic():
+                contact_msg = ContactMessage.objects.create(
+                    name=name,
+                    email=email,
+                    subject=subject,
+                    message=message,
+                    is_spam=is_spam,
+                    spam_score=spam_score,
+                )
+                if not is_spam:
+                    outbox.queue_notification(contact_msg)
+        except Exception:
+            spam.forget(fingerprint)
+            raise
+        if is_spam:
+            throttle.shed.record('spam')
+        messages.success(request, 'Your message has been sent successfully!')
         
         return redirect('contact')
     
@@ -0,0 +1,27 @@
+from django.contrib import admin
+from . import jobs
+from .models import Job, Tag
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug')
+    prepopulated_fields = {'slug': ('name',)}
+    search_fields = ('name',)
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('key', 'kind', 'status', 'attempts', 'max_attempts', 'run_after', 'updated_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('key',)
+    readonly_fields = ('kind', 'key', 'payload', 'status', 'attempts', 'run_after', 'last_error',
+                       'created_at', 'updated_at', 'finished_at')
+    date_hierarchy = 'created_at'
+    actions = ['retry_jobs']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Retry selected jobs')
+    def retry_jobs(self, request, queryset):
+        count = jobs.retry(queryset.exclude(status=Job.RUNNING))
+        self.message_user(request, f'{count} job(s) queued again.')
@@ -0,0 +1,45 @@
+"""
+Conditional GET support for content pages.
+
+``conditional_page`` wraps Django's ``condition`` decorator so a view's ETag
+and Last-Modified come from one cheap validator function, evaluated once per
+request. A request whose validators match gets a 304 before the view (and its
+template) runs at all.
+
+A validator function takes the view's arguments and returns ``(parts,
+last_modified)``: ``parts`` is any sequence describing the data the page is
+built from, ``last_modified`` an aware datetime or ``None``. Returning
+``(None, None)`` disables validation for that request.
+"""
+import hashlib
+from functools import wraps
+
+from django.views.decorators.http import condition
+
+
+def _validators(request, compute, args, kwargs):
+    if not hasattr(request, '_page_validators'):
+        parts, last_modified = compute(request, *args, **kwargs)
+        etag = None
+        if parts is not None:
+            seed = '|'.join(str(part) for part in parts) + '|' + request.get_full_path()
+            etag = hashlib.md5(seed.encode()).hexdigest()
+        request._page_validators = (etag, last_modified)
+    return request._page_validators
+
+
+def page_etag(request):
+    """The ETag computed for this request by ``conditional_page``, if any."""
+    return getattr(request, '_page_validators', (None, None))[0]
+
+
+def conditional_page(compute):
+    def decorator(view):
+        def etag_func(request, *args, **kwargs):
+            return _validators(request, compute, args, kwargs)[0]
+
+        def last_modified_func(request, *args, **kwargs):
+            return _validators(request, compute, args, kwargs)[1]
+
+        return wraps(view)(condition(etag_func=etag_func, last_modified_func=last_modified_func)(view))
+    return decorator
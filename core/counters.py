@@ -0,0 +1,47 @@
+"""
+Event counters shared by every worker.
+
+A ``Counters`` object counts named events in process memory and adds them to
+cache counters in batches, every ``flush_every`` events or ``flush_seconds``,
+so counting does not add a cache write to every request. ``totals()`` flushes
+this process's pending counts before reading, so a management command sees
+everything but what other processes have not flushed yet.
+"""
+import time
+
+from django.core.cache import cache
+
+
+class Counters:
+    def __init__(self, keys, flush_every=100, flush_seconds=30):
+        self.keys = keys
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self._pending = dict.fromkeys(keys, 0)
+        self._last_flush = time.monotonic()
+
+    def record(self, name):
+        self._pending[name] += 1
+        now = time.monotonic()
+        if sum(self._pending.values()) >= self.flush_every or now - self._last_flush >= self.flush_seconds:
+            self.flush()
+            self._last_flush = now
+
+    def flush(self):
+        for name, count in self._pending.items():
+            if count:
+                key = self.keys[name]
+                if not cache.add(key, count, None):
+                    try:
+                        cache.incr(key, count)
+                    except ValueError:
+                        cache.set(key, count, None)
+                self._pending[name] = 0
+
+    def totals(self):
+        self.flush()
+        return {name: cache.get(key, 0) for name, key in self.keys.items()}
+
+    def reset(self):
+        self._pending = dict.fromkeys(self.keys, 0)
+        cache.delete_many(list(self.keys.values()))
@@ -0,0 +1,183 @@
+"""
+Resized derivatives of uploaded images.
+
+Every upload gets WebP and JPEG copies at the ``WIDTHS`` that are not wider
+than the original, stored next to it (``projects/foo.jpg.w320.webp``). A
+manifest (``projects/foo.jpg.derivatives.json``) records the original's size
+and the derivative names. Both keep the source's extension, so ``foo.png`` and
+``foo.jpg`` never share derivatives. The manifest is also cached, so
+rendering a card needs no storage access.
+
+``ensure_derivatives()`` is idempotent: it only creates the files that are
+missing. Uploads never call it inline; saving a model queues an
+``images.derivatives`` job (see ``core.jobs``) for ``manage.py run_worker``.
+The ``responsive_image`` template tag only reads manifests. It renders the
+original until one exists and never touches the job table, so a page render
+runs no queries and cannot restart a job that failed. Images with no job,
+such as uploads from before derivatives existed, are covered by the
+``generate_image_derivatives`` command, which calls ``ensure_derivatives()``
+directly.
+
+Creating derivatives bumps ``version()``. Pages that render images include
+it in their validators (and cache keys), so a page cached or validated
+before the worker ran picks up the new ``srcset``.
+"""
+import json
+import logging
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from . import jobs, snapshots
+
+logger = logging.getLogger(__name__)
+
+WIDTHS = (160, 320, 640, 960, 1280)
+FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+MANIFEST_SUFFIX = '.derivatives.json'
+MANIFEST_TIMEOUT = 60 * 60 * 24
+# How long a render remembers that derivatives are not ready before checking
+# storage again.
+MISSING_TIMEOUT = 60 * 5
+VERSION_KEY = 'images:version'
+
+
+def _cache_key(name):
+    return f'images:manifest:{name}'
+
+
+def version():
+    return snapshots.get_version(VERSION_KEY)
+
+
+def derivative_name(name, width, extension):
+    return f'{name}.w{width}.{extension}'
+
+
+def manifest_name(name):
+    return f'{name}{MANIFEST_SUFFIX}'
+
+
+def target_widths(width):
+    """Derivative widths for an original ``width`` pixels wide, never upscaled."""
+    widths = [target for target in WIDTHS if target < width]
+    if width <= WIDTHS[-1]:
+        widths.append(width)
+    return widths
+
+
+def _load_manifest(name, storage):
+    path = manifest_name(name)
+    if not storage.exists(path):
+        return None
+    try:
+        with storage.open(path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_complete(manifest, storage):
+    return all(
+        storage.exists(derivative)
+        for variants in manifest['derivatives'].values()
+        for derivative in variants.values()
+    )
+
+
+def _encode(image, width, extension):
+    height = max(1, round(image.height * width / image.width))
+    resized = image.resize((width, height), Image.LANCZOS) if width != image.width else image
+    if extension == 'jpeg' and resized.mode != 'RGB':
+        background = Image.new('RGB', resized.size, (255, 255, 255))
+        background.paste(resized, mask=resized.getchannel('A') if 'A' in resized.getbands() else None)
+        resized = background
+    buffer = BytesIO()
+    resized.save(buffer, **FORMATS[extension])
+    return buffer.getvalue()
+
+
+def _generate(name, storage):
+    with storage.open(name) as handle:
+        image = Image.open(handle)
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        image.load()
+
+    manifest = {'width': image.width, 'height': image.height, 'derivatives': {}}
+    for extension in FORMATS:
+        variants = manifest['derivatives'][extension] = {}
+        for width in target_widths(image.width):
+            path = derivative_name(name, width, extension)
+            if not storage.exists(path):
+                storage.save(path, ContentFile(_encode(image, width, extension)))
+            variants[str(width)] = path
+    storage.delete(manifest_name(name))
+    storage.save(manifest_name(name), ContentFile(json.dumps(manifest).encode()))
+    return manifest
+
+
+def ensure_derivatives(name, storage=None):
+    """
+    Return the manifest for the image ``name``, creating whatever is missing.
+
+    Returns ``None`` when the source does not exist or cannot be decoded.
+    """
+    if not name:
+        return None
+    storage = storage or default_storage
+    manifest = _load_manifest(name, storage)
+    if manifest is None or not _is_complete(manifest, storage):
+        if not storage.exists(name):
+            return None
+        try:
+            manifest = _generate(name, storage)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            logger.warning('Could not create derivatives for %s', name, exc_info=True)
+            return None
+        snapshots.bump_version(VERSION_KEY)
+    cache.set(_cache_key(name), manifest, MANIFEST_TIMEOUT)
+    return manifest
+
+
+@jobs.handler('images.derivatives')
+def build_derivatives(payload):
+    if ensure_derivatives(payload['name']) is None:
+        raise OSError(f"Cannot read image {payload['name']!r}")
+
+
+def queue_derivatives(name):
+    return jobs.enqueue('images.derivatives', f'images.derivatives:{name}', {'name': name})
+
+
+def get_manifest(name):
+    """
+    Cached manifest for ``name``, or ``None`` while its derivatives are not
+    ready. Never queues a job: this runs on every page render.
+    """
+    if not name:
+        return None
+    manifest = cache.get(_cache_key(name))
+    if manifest is None:
+        manifest = _load_manifest(name, default_storage)
+        if manifest is not None and _is_complete(manifest, default_storage):
+            cache.set(_cache_key(name), manifest, MANIFEST_TIMEOUT)
+        else:
+            manifest = None
+            # Store a falsy marker so the check is not repeated per request;
+            # ensure_derivatives() replaces it once the worker has run.
+            cache.set(_cache_key(name), {}, MISSING_TIMEOUT)
+    return manifest or None
+
+
+def queue_for(field_file):
+    """``post_save`` helper: queue derivatives for a model's image field."""
+    if field_file:
+        queue_derivatives(field_file.name)
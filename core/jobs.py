@@ -0,0 +1,96 @@
+"""
+A small job queue stored in the ``core.Job`` table.
+
+Code that would otherwise do slow work inside a request calls ``enqueue()``.
+That call adds a row in the caller's transaction, so the job is created only
+if the save it belongs to commits. ``manage.py run_worker`` claims due jobs and
+runs their handlers in a process pool, so a gunicorn worker never waits on
+them.
+
+Handlers are plain functions registered by name with ``@handler('kind')`` and
+called with the job's JSON payload. They should be idempotent: a job is
+retried with exponential backoff when its handler raises, and it is marked
+failed after ``max_attempts``.
+"""
+import traceback
+from datetime import timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+RETRY_BASE_SECONDS = 30
+# Running jobs not heard from for this long are assumed orphaned by a crash.
+STALE_AFTER = timedelta(minutes=15)
+
+_handlers = {}
+
+
+def handler(kind):
+    def register(func):
+        _handlers[kind] = func
+        return func
+    return register
+
+
+def enqueue(kind, key, payload, max_attempts=3, rerun=False):
+    """
+    Queue ``kind`` with ``payload`` unless a job with the same ``key`` exists.
+
+    An existing pending, running or finished job is returned as is; a failed
+    one (or a finished one, with ``rerun``) is reset so it runs again.
+    """
+    job, created = Job.objects.get_or_create(
+        key=key,
+        defaults={'kind': kind, 'payload': payload, 'max_attempts': max_attempts},
+    )
+    if not created and (job.status == Job.FAILED or (rerun and job.status == Job.DONE)):
+        retry(Job.objects.filter(pk=job.pk))
+        job.refresh_from_db()
+    return job
+
+
+def retry(jobs):
+    return jobs.update(status=Job.PENDING, attempts=0, run_after=timezone.now(), last_error='', finished_at=None)
+
+
+def claim(limit):
+    """Mark up to ``limit`` due jobs as running and return them."""
+    claimed = []
+    due = Job.objects.filter(status=Job.PENDING, run_after__lte=timezone.now()).order_by('run_after', 'id')
+    for pk in due.values_list('pk', flat=True)[:limit]:
+        # The status check makes the claim safe against other workers.
+        if Job.objects.filter(pk=pk, status=Job.PENDING).update(
+            status=Job.RUNNING, attempts=F('attempts') + 1, updated_at=timezone.now()
+        ):
+            claimed.append(Job.objects.get(pk=pk))
+    return claimed
+
+
+def requeue_stale():
+    cutoff = timezone.now() - STALE_AFTER
+    return Job.objects.filter(status=Job.RUNNING, updated_at__lt=cutoff).update(status=Job.PENDING)
+
+
+def run(kind, payload):
+    """Run a job's handler; this is what the worker processes execute."""
+    try:
+        func = _handlers[kind]
+    except KeyError:
+        raise LookupError(f'No handler registered for job kind {kind!r}') from None
+    func(payload)
+
+
+def complete(job):
+    Job.objects.filter(pk=job.pk).update(status=Job.DONE, last_error='', finished_at=timezone.now())
+
+
+def fail(job, error):
+    """Record a failed attempt; retry later or give up after ``max_attempts``."""
+    message = ''.join(traceback.format_exception(error))[-4000:]
+    if job.attempts >= job.max_attempts:
+        Job.objects.filter(pk=job.pk).update(status=Job.FAILED, last_error=message, finished_at=timezone.now())
+    else:
+        delay = timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (job.attempts - 1))
+        Job.objects.filter(pk=job.pk).update(status=Job.PENDING, last_error=message, run_after=timezone.now() + delay)
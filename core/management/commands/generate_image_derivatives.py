@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core import images
+from portfolio.models import Project
+from services.models import DemoProject
+from testimonials.models import Testimonial
+
+MODELS = (Project, DemoProject, Testimonial)
+
+
+class Command(BaseCommand):
+    help = 'Create any missing resized derivatives of uploaded project and testimonial images.'
+
+    def handle(self, *args, **options):
+        done = failed = 0
+        for model in MODELS:
+            names = model.objects.exclude(image='').exclude(image__isnull=True).values_list('image', flat=True)
+            for name in names.iterator():
+                if images.ensure_derivatives(name) is None:
+                    failed += 1
+                    self.stderr.write(f'Skipped {name}: missing or unreadable')
+                else:
+                    done += 1
+        self.stdout.write(self.style.SUCCESS(f'Derivatives ready for {done} images ({failed} skipped).'))
@@ -0,0 +1,85 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.db import connections
+from django.core.management.base import BaseCommand
+
+from core import jobs
+
+
+def _init_process():
+    # Forked children inherit the parent's configured apps; spawned ones
+    # (other start methods) have to set Django up themselves.
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+    # Never reuse the parent's SQLite connection across a fork.
+    connections.close_all()
+
+
+def _run(kind, payload):
+    jobs.run(kind, payload)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (image derivatives, related posts, ...) in a process pool.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2, help='Worker processes (default 2).')
+        parser.add_argument('--poll', type=float, default=2.0, help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--once', action='store_true', help='Exit once no jobs are due instead of polling.')
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        pool = self._pool(processes)
+        try:
+            while True:
+                # Every poll, not just at startup: jobs orphaned by a restart
+                # are still "running" and too recent when the new worker starts.
+                stale = jobs.requeue_stale()
+                if stale:
+                    self.stdout.write(f'Requeued {stale} stale jobs.')
+                batch = jobs.claim(processes * 2)
+                if not batch:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+                    continue
+                if self._run_batch(pool, batch):
+                    # A child died (out of memory, a crash in Pillow) and took
+                    # the pool with it. Its batch has been failed; start a fresh one.
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = self._pool(processes)
+        finally:
+            pool.shutdown()
+
+    def _pool(self, processes):
+        connections.close_all()
+        return ProcessPoolExecutor(max_workers=processes, initializer=_init_process)
+
+    def _run_batch(self, pool, batch):
+        """Run ``batch`` in ``pool``; return whether the pool broke."""
+        futures = {}
+        broken = None
+        try:
+            for job in batch:
+                futures[pool.submit(_run, job.kind, job.payload)] = job
+        except BrokenProcessPool as error:
+            broken = error
+        wait(futures)
+        results = [(job, future.exception()) for future, job in futures.items()]
+        results += [(job, broken) for job in batch[len(futures):]]
+        for job, error in results:
+            if error is None:
+                jobs.complete(job)
+                self.stdout.write(f'Done {job.key}')
+            else:
+                jobs.fail(job, error)
+                self.stderr.write(f'Failed {job.key} (attempt {job.attempts}): {error}')
+                if isinstance(error, BrokenProcessPool):
+                    broken = error
+        return broken is not None
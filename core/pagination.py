@@ -0,0 +1,163 @@
+"""
+Keyset (cursor) pagination.
+
+Instead of ``OFFSET n``, each page is fetched with a ``WHERE`` clause on the
+ordering columns of the last row already shown, so deep pages cost the same
+as the first one as long as an index covers the ordering. Cursors are opaque
+URL-safe strings encoding those column values. They come from the query string,
+so every value is parsed with its model field on the way back in and anything
+malformed raises ``InvalidCursor``.
+
+``CachedCountPaginator`` is a drop-in ``Paginator`` for offset pages (such as
+admin changelists) whose ``COUNT(*)`` is too slow to run on every request.
+"""
+import base64
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps([str(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, fields):
+    """Decode ``cursor`` into one value per model field in ``fields``."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor(cursor) from exc
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise InvalidCursor(cursor)
+    if not all(isinstance(value, str) for value in values):
+        raise InvalidCursor(cursor)
+    try:
+        return [field.to_python(value) for field, value in zip(fields, values)]
+    except (ValidationError, ValueError, TypeError, OverflowError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+class KeysetPage:
+    def __init__(self, object_list, has_next, has_previous, next_cursor, previous_cursor, total=None):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.total = total
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Paginate ``queryset`` by the unique, fully-ordered key ``ordering``.
+
+    The last field of ``ordering`` must make the key unique (normally the
+    primary key). Pass ``approximate_total=True`` to attach a row count that is
+    computed at most once per ``count_timeout`` seconds instead of per request.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-id',), approximate_total=False,
+                 count_timeout=300, count_key=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+        self.fields = [field.lstrip('-') for field in self.ordering]
+        opts = queryset.model._meta
+        self.model_fields = [opts.pk if name == 'pk' else opts.get_field(name) for name in self.fields]
+        self.approximate_total = approximate_total
+        self.count_timeout = count_timeout
+        self.count_key = count_key
+
+    def _seek(self, values, forward):
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            descending = field.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            step = Q(**{f'{self.fields[index]}__{lookup}': values[index]})
+            for previous, value in zip(self.fields[:index], values[:index]):
+                step &= Q(**{previous: value})
+            condition |= step
+        return condition
+
+    def _reversed_ordering(self):
+        return [field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering]
+
+    def _cursor_for(self, obj):
+        return encode_cursor([getattr(obj, field) for field in self.fields])
+
+    def count(self):
+        key = self.count_key or 'keyset-count:' + hashlib.md5(str(self.queryset.query).encode()).hexdigest()
+        total = cache.get(key)
+        if total is None:
+            total = self.queryset.count()
+            cache.set(key, total, self.count_timeout)
+        return total
+
+    def page(self, after=None, before=None):
+        """Return the page following ``after`` or preceding ``before``."""
+        queryset = self.queryset
+        if before:
+            values = decode_cursor(before, self.model_fields)
+            queryset = queryset.filter(self._seek(values, forward=False))
+            rows = list(queryset.order_by(*self._reversed_ordering())[:self.per_page + 1])
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            has_next = True
+        else:
+            if after:
+                values = decode_cursor(after, self.model_fields)
+                queryset = queryset.filter(self._seek(values, forward=True))
+            rows = list(queryset.order_by(*self.ordering)[:self.per_page + 1])
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            has_previous = bool(after)
+
+        return KeysetPage(
+            rows,
+            has_next=has_next and bool(rows),
+            has_previous=has_previous and bool(rows),
+            next_cursor=self._cursor_for(rows[-1]) if rows else None,
+            previous_cursor=self._cursor_for(rows[0]) if rows else None,
+            total=self.count() if self.approximate_total else None,
+        )
+
+
+class CachedCountPaginator(Paginator):
+    """
+    ``Paginator`` whose total is cached per query for ``count_timeout``
+    seconds. After bulk changes the page count can lag by that long; pages
+    past the end just come back empty.
+    """
+    count_timeout = 60
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None:
+            return super().count
+        key = 'paginator-count:' + hashlib.md5(str(query).encode()).hexdigest()
+        total = cache.get(key)
+        if total is None:
+            total = self.object_list.count()
+            cache.set(key, total, self.count_timeout)
+        return total
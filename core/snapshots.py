@@ -0,0 +1,69 @@
+"""
+Versioned in-process snapshots.
+
+A ``Snapshot`` keeps a value built from the database in process memory and
+rebuilds it only when a version token in the shared cache changes. Model
+signal receivers call ``invalidate()`` (or bump whatever version the snapshot
+follows), and every gunicorn worker notices on its next ``get()``. Checking
+the version is a cache read, so the hot path never touches the database.
+"""
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+
+
+def new_version():
+    return f'{time.time():.6f}-{uuid.uuid4().hex[:8]}'
+
+
+def version_time(version):
+    """The moment a version token was created, usable as Last-Modified."""
+    return datetime.fromtimestamp(float(version.split('-')[0]), tz=timezone.utc)
+
+
+def get_version(key):
+    """Return the version token under ``key``, starting one if it was evicted."""
+    version = cache.get(key)
+    if version is None:
+        fresh = new_version()
+        cache.add(key, fresh, None)
+        version = cache.get(key) or fresh
+    return version
+
+
+def bump_version(key):
+    cache.set(key, new_version(), None)
+
+
+class Snapshot:
+    def __init__(self, name, builder, version=None):
+        self.name = name
+        self.builder = builder
+        self.version_key = f'snapshot:{name}:version'
+        self._version_func = version or self.current_version
+        self._version = None
+        self._value = None
+        self._lock = threading.Lock()
+
+    def current_version(self):
+        return get_version(self.version_key)
+
+    @property
+    def version(self):
+        return self._version_func()
+
+    def get(self):
+        version = self._version_func()
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._value = self.builder()
+                    self._version = version
+        return self._value
+
+    def invalidate(self, **kwargs):
+        """Bump the shared version; usable directly as a signal receiver."""
+        bump_version(self.version_key)
@@ -0,0 +1,45 @@
+"""
+Normalized tag storage.
+
+Models keep their human-edited ``tags`` JSON list, and mirror it into an
+indexed ``tag_index`` many-to-many relation to ``core.Tag`` whenever they are
+saved, so filtering by tag is a join through an index instead of a scan over
+every row's JSON.
+"""
+from django.utils.text import slugify
+
+
+def parse_tags(value):
+    """Return tags as a de-duplicated list, accepting a list or a comma-separated string."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    names = []
+    seen = set()
+    for name in value:
+        name = str(name).strip()
+        slug = slugify(name)
+        if slug and slug not in seen:
+            seen.add(slug)
+            names.append(name)
+    return names
+
+
+def get_tags(names, tag_model=None):
+    """Return ``Tag`` rows for ``names``, creating any that do not exist yet."""
+    if tag_model is None:
+        from .models import Tag as tag_model
+    by_slug = {slugify(name): name for name in names}
+    if not by_slug:
+        return []
+    existing = {tag.slug: tag for tag in tag_model.objects.filter(slug__in=by_slug)}
+    missing = [tag_model(name=name, slug=slug) for slug, name in by_slug.items() if slug not in existing]
+    if missing:
+        tag_model.objects.bulk_create(missing, ignore_conflicts=True)
+        existing = {tag.slug: tag for tag in tag_model.objects.filter(slug__in=by_slug)}
+    return [existing[slug] for slug in by_slug if slug in existing]
+
+
+def sync_tags(instance):
+    instance.tag_index.set(get_tags(parse_tags(instance.tags)))
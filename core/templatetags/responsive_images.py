@@ -0,0 +1,41 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from core import images
+
+register = template.Library()
+
+
+def _srcset(variants):
+    return format_html_join(', ', '{} {}w', (
+        (images.default_storage.url(path), width)
+        for width, path in sorted(variants.items(), key=lambda item: int(item[0]))
+    ))
+
+
+@register.simple_tag
+def responsive_image(image, sizes='100vw', alt='', fallback='', **attrs):
+    """
+    Render ``image`` (an ImageField value) as a <picture> with WebP and JPEG
+    ``srcset``s, ``sizes`` and the original's width/height.
+
+    Falls back to a plain <img> of the original, or of ``fallback`` when the
+    field is empty, while derivatives cannot be built.
+    """
+    extra = format_html_join('', ' {}="{}"', sorted(attrs.items()))
+    manifest = images.get_manifest(image.name) if image else None
+    if manifest is None:
+        src = image.url if image else fallback
+        return format_html('<img src="{}" alt="{}"{} loading="lazy" decoding="async">', src, alt, extra)
+
+    jpeg = manifest['derivatives']['jpeg']
+    largest = jpeg[max(jpeg, key=int)]
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}"{} loading="lazy" decoding="async">'
+        '</picture>',
+        _srcset(manifest['derivatives']['webp']), sizes,
+        images.default_storage.url(largest), _srcset(jpeg), sizes,
+        manifest['width'], manifest['height'], alt, extra,
+    )
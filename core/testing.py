@@ -0,0 +1,82 @@
+"""
+Query-budget assertions for view tests.
+
+``QueryBudgetTestCase`` requests a URL with the test client while recording
+every SQL statement it runs, and fails when the count exceeds the route's
+budget. The failure message lists the captured SQL, so an N+1 shows up as the
+same statement repeated once per row.
+
+Budgets are meant to be checked at more than one fixture size with
+``assertBudgetHolds``: a route whose query count grows with the number of rows
+fails there even if a small fixture happens to fit the budget.
+
+``BAD_CURSORS`` are tampered keyset cursors for checking that paginated views
+reject them cleanly.
+"""
+import base64
+import json
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .pagination import encode_cursor
+
+# Page caches and snapshots must not leak between tests (or into the
+# project's file cache).
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'query-budget-tests',
+    }
+}
+
+
+
+def _raw_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+BAD_CURSORS = [
+    encode_cursor(['2025-01-01 00:00:00+00:00', 'abc']),
+    _raw_cursor([None, '1']),
+    _raw_cursor(['not a date', '1']),
+    _raw_cursor([1, 2]),
+    _raw_cursor(['2025-01-01 00:00:00+00:00']),
+    'not-base64!',
+]
+
+
+def record_queries(client, url, **extra):
+    """GET ``url`` and return ``(response, [sql, ...])``."""
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, **extra)
+    return response, [query['sql'] for query in context.captured_queries]
+
+
+@override_settings(CACHES=TEST_CACHES)
+class QueryBudgetTestCase(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def assertQueryBudget(self, url, budget, status=200, **extra):
+        response, queries = record_queries(self.client, url, **extra)
+        self.assertEqual(response.status_code, status, f'{url} returned {response.status_code}')
+        if len(queries) > budget:
+            listing = '\n'.join(f'{number}. {sql}' for number, sql in enumerate(queries, 1))
+            self.fail(f'{url} ran {len(queries)} queries, budget is {budget}:\n{listing}')
+        return response
+
+    def assertBudgetHolds(self, url, budget, grow, sizes=(1, 10), **extra):
+        """
+        Check ``url`` against ``budget`` after ``grow(n)`` adds ``n`` rows,
+        for each ``n`` in ``sizes``. The cache is cleared between rounds so
+        every round renders from the database.
+        """
+        for size in sizes:
+            grow(size)
+            cache.clear()
+            self.assertQueryBudget(url, budget, **extra)
@@ -0,0 +1,226 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from . import images, jobs
+from .counters import Counters
+from .models import Job
+from .testing import TEST_CACHES
+
+def image_file(extension, colour, size=(400, 300)):
+    buffer = BytesIO()
+    Image.new('RGB', size, colour).save(buffer, format={'png': 'PNG', 'jpg': 'JPEG'}[extension])
+    return ContentFile(buffer.getvalue())
+
+class MediaTestCase(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings = override_settings(CACHES=TEST_CACHES, MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        cache.clear()
+
+@override_settings(CACHES=TEST_CACHES)
+class CounterTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counts_are_flushed_in_batches(self):
+        counters = Counters({'hit': 'tests:hits', 'miss': 'tests:misses'}, flush_every=3, flush_seconds=60)
+        counters.record('hit')
+        counters.record('miss')
+        self.assertIsNone(cache.get('tests:hits'))
+        counters.record('hit')
+        self.assertEqual((cache.get('tests:hits'), cache.get('tests:misses')), (2, 1))
+
+        # Another process adds to the same cache counters.
+        other = Counters(counters.keys)
+        other.record('hit')
+        self.assertEqual(other.totals(), {'hit': 3, 'miss': 1})
+        counters.record('miss')
+        self.assertEqual(counters.totals(), {'hit': 3, 'miss': 2})
+
+        counters.record('hit')
+        counters.reset()
+        self.assertEqual(counters.totals(), {'hit': 0, 'miss': 0})
+
+class JobTests(TestCase):
+
+    def claim_one(self):
+        claimed = jobs.claim(1)
+        self.assertEqual(len(claimed), 1)
+        return claimed[0]
+
+    def make_due(self, job):
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+
+    def test_failures_back_off_then_give_up(self):
+        job = jobs.enqueue('tests.flaky', 'tests.flaky:1', {}, max_attempts=3)
+        for attempt, delay in ((1, 30), (2, 60)):
+            job = self.claim_one()
+            self.assertEqual((job.status, job.attempts), (Job.RUNNING, attempt))
+            before = timezone.now()
+            jobs.fail(job, OSError('disk full'))
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.PENDING)
+            self.assertIn('disk full', job.last_error)
+            self.assertGreaterEqual(job.run_after, before + timedelta(seconds=delay))
+            self.assertLess(job.run_after, before + timedelta(seconds=delay + 5))
+            self.assertEqual(jobs.claim(1), [])
+            self.make_due(job)
+
+        jobs.fail(self.claim_one(), OSError('disk full'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 3))
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(jobs.claim(1), [])
+
+    def test_enqueue_is_idempotent(self):
+        job = jobs.enqueue('tests.noop', 'tests.noop:1', {'n': 1})
+        self.assertEqual(jobs.enqueue('tests.noop', 'tests.noop:1', {'n': 2}).pk, job.pk)
+        self.assertEqual(Job.objects.count(), 1)
+
+        jobs.complete(self.claim_one())
+        self.assertEqual(jobs.enqueue('tests.noop', 'tests.noop:1', {}).status, Job.DONE)
+        self.assertEqual(jobs.enqueue('tests.noop', 'tests.noop:1', {}, rerun=True).status, Job.PENDING)
+
+    def test_enqueue_resets_failed_jobs(self):
+        jobs.enqueue('tests.noop', 'tests.noop:1', {}, max_attempts=1)
+        jobs.fail(self.claim_one(), ValueError('bad payload'))
+
+        job = jobs.enqueue('tests.noop', 'tests.noop:1', {})
+        self.assertEqual((job.status, job.attempts, job.last_error), (Job.PENDING, 0, ''))
+        self.assertEqual(self.claim_one().pk, job.pk)
+
+    def test_requeue_stale(self):
+        stale = jobs.enqueue('tests.noop', 'tests.noop:stale', {})
+        fresh = jobs.enqueue('tests.noop', 'tests.noop:fresh', {})
+        jobs.claim(2)
+        Job.objects.filter(pk=stale.pk).update(updated_at=timezone.now() - jobs.STALE_AFTER - timedelta(seconds=1))
+
+        self.assertEqual(jobs.requeue_stale(), 1)
+        self.assertEqual(Job.objects.get(pk=stale.pk).status, Job.PENDING)
+        self.assertEqual(Job.objects.get(pk=fresh.pk).status, Job.RUNNING)
+
+    def test_run(self):
+        calls = []
+        with mock.patch.dict(jobs._handlers, {'tests.record': calls.append}):
+            jobs.run('tests.record', {'n': 1})
+        self.assertEqual(calls, [{'n': 1}])
+        with self.assertRaises(LookupError):
+            jobs.run('tests.unknown', {})
+
+class Stop(Exception):
+    pass
+
+class WorkerTests(TestCase):
+
+    def run_worker(self, handlers, **options):
+        with mock.patch.dict(jobs._handlers, handlers):
+            call_command('run_worker', processes=1, stdout=StringIO(), stderr=StringIO(), **options)
+
+    def test_crashed_child_fails_its_batch_and_the_worker_carries_on(self):
+        jobs.enqueue('tests.crash', 'tests.crash:1', {})
+        jobs.enqueue('tests.noop', 'tests.noop:1', {})
+        claim = jobs.claim
+        # One job per batch, so the second one needs a new pool.
+        with mock.patch.object(jobs, 'claim', side_effect=lambda limit: claim(1)):
+            self.run_worker({'tests.crash': lambda payload: os._exit(1), 'tests.noop': lambda payload: None}, once=True)
+        crashed = Job.objects.get(key='tests.crash:1')
+        self.assertEqual((crashed.status, crashed.attempts), (Job.PENDING, 1))
+        self.assertIn('BrokenProcessPool', crashed.last_error)
+        self.assertEqual(Job.objects.get(key='tests.noop:1').status, Job.DONE)
+
+    def test_stale_jobs_are_requeued_while_polling(self):
+        def sleep(seconds):
+            if Job.objects.exists():
+                raise Stop
+            # A job orphaned by a worker that was killed mid-batch.
+            job = jobs.enqueue('tests.noop', 'tests.noop:orphan', {})
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.RUNNING, updated_at=timezone.now() - jobs.STALE_AFTER - timedelta(seconds=1)
+            )
+
+        with mock.patch('core.management.commands.run_worker.time.sleep', side_effect=sleep):
+            with self.assertRaises(Stop):
+                self.run_worker({'tests.noop': lambda payload: None}, poll=0)
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+class DerivativeTests(MediaTestCase):
+
+    def test_ensure_derivatives_is_idempotent(self):
+        name = default_storage.save('projects/photo.jpg', image_file('jpg', 'green', size=(700, 400)))
+        manifest = images.ensure_derivatives(name)
+        self.assertEqual(sorted(manifest['derivatives']['webp'], key=int), ['160', '320', '640', '700'])
+
+        with mock.patch.object(default_storage, 'save', wraps=default_storage.save) as save:
+            self.assertEqual(images.ensure_derivatives(name), manifest)
+        save.assert_not_called()
+
+        missing = manifest['derivatives']['webp']['320']
+        default_storage.delete(missing)
+        with mock.patch.object(default_storage, 'save', wraps=default_storage.save) as save:
+            self.assertEqual(images.ensure_derivatives(name), manifest)
+        self.assertEqual(
+            [call.args[0] for call in save.call_args_list], [missing, images.manifest_name(name)]
+        )
+
+    def test_derivatives_job(self):
+        name = default_storage.save('projects/photo.jpg', image_file('jpg', 'green'))
+        job = images.queue_derivatives(name)
+        self.assertEqual(images.queue_derivatives(name).pk, job.pk)
+
+        jobs.run(job.kind, job.payload)
+        self.assertTrue(default_storage.exists(images.manifest_name(name)))
+        with self.assertRaises(OSError):
+            jobs.run('images.derivatives', {'name': 'projects/missing.jpg'})
+
+    def test_rendering_never_queues_jobs(self):
+        name = default_storage.save('projects/photo.jpg', image_file('jpg', 'green'))
+        with self.assertNumQueries(0):
+            self.assertIsNone(images.get_manifest(name))
+        self.assertFalse(Job.objects.exists())
+
+        # A source that cannot be decoded fails for good; renders leave it alone.
+        broken = default_storage.save('projects/broken.jpg', ContentFile(b'not an image'))
+        job = images.queue_derivatives(broken)
+        Job.objects.filter(pk=job.pk).update(status=Job.FAILED)
+        cache.clear()
+        with self.assertNumQueries(0):
+            self.assertIsNone(images.get_manifest(broken))
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.FAILED)
+
+        images.ensure_derivatives(name)
+        self.assertEqual(images.get_manifest(name)['width'], 400)
+
+    def test_sources_with_the_same_stem_do_not_share_derivatives(self):
+        png = default_storage.save('projects/logo.png', image_file('png', 'red'))
+        jpg = default_storage.save('projects/logo.jpg', image_file('jpg', 'blue'))
+
+        png_manifest = images.ensure_derivatives(png)
+        jpg_manifest = images.ensure_derivatives(jpg)
+
+        self.assertNotEqual(images.manifest_name(png), images.manifest_name(jpg))
+        self.assertEqual(png_manifest['derivatives']['webp']['320'], 'projects/logo.png.w320.webp')
+        self.assertEqual(jpg_manifest['derivatives']['webp']['320'], 'projects/logo.jpg.w320.webp')
+        with default_storage.open(png_manifest['derivatives']['jpeg']['320']) as handle:
+            self.assertGreater(Image.open(handle).convert('RGB').getpixel((0, 0))[0], 200)
+        with default_storage.open(jpg_manifest['derivatives']['jpeg']['320']) as handle:
+            self.assertGreater(Image.open(handle).convert('RGB').getpixel((0, 0))[2], 200)
+        cache.clear()
+        self.assertEqual(images.get_manifest(png), png_manifest)
+        self.assertEqual(images.get_manifest(jpg), jpg_manifest)
@@ -0,0 +1,28 @@
+"""
+Pre-grouped FAQ snapshot.
+
+``groups`` holds the active FAQs split by category, in the category choice
+order and each ordered by ``order`` then ``created_at``. Only non-empty
+categories are included. ``faq.signals`` invalidates it whenever an FAQ is
+saved or deleted, so the FAQ page renders without any query.
+"""
+from core.snapshots import Snapshot
+
+from .models import FAQ
+
+
+def build_groups():
+    faqs = list(FAQ.objects.filter(is_active=True).order_by('order', 'created_at', 'id'))
+    groups = []
+    for key, label in FAQ._meta.get_field('category').choices:
+        items = [faq for faq in faqs if faq.category == key]
+        if items:
+            groups.append({'key': key, 'label': label, 'faqs': items})
+    return {
+        'groups': groups,
+        'by_key': {group['key']: group for group in groups},
+        'count': sum(len(group['faqs']) for group in groups),
+    }
+
+
+groups = Snapshot('faq:groups', build_groups)
@@ -0,0 +1,123 @@
+"""
+Typo-tolerant FAQ search over an in-memory trigram index.
+
+Every distinct word in the active FAQs is split into padded trigrams
+(``"  dj", " dj", "dja", ..., "go "``). The index maps each trigram to the words
+containing it, and each word to the FAQs using it with a field weight
+(question text counts more than the answer).
+
+A query word is matched against the vocabulary by trigram overlap (Jaccard
+similarity), so misspellings still find their words. Each FAQ scores the best
+similarity times weight per query word, summed over the query words. All of
+this is NumPy array work over the vocabulary and postings. It stays well
+under a millisecond for a few thousand FAQs.
+
+The index is built from the ``faq.cache.groups`` snapshot and follows its
+version, so it is rebuilt whenever an FAQ changes and costs no query.
+"""
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+from django.utils.html import strip_tags
+
+from core.snapshots import Snapshot
+
+from . import cache
+
+FIELD_WEIGHTS = {'question': 3.0, 'additional_info': 1.5, 'answer': 1.0}
+# Minimum trigram similarity for a vocabulary word to count as a match.
+MIN_SIMILARITY = 0.35
+# Vocabulary words considered per query word, most similar first.
+MAX_EXPANSIONS = 20
+MAX_RESULTS = 10
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', strip_tags(text or ''))
+    return ''.join(char for char in text if not unicodedata.combining(char)).lower()
+
+
+def words(text):
+    return [word for word in _WORD_RE.findall(normalize(text)) if len(word) > 1]
+
+
+def trigrams(word):
+    padded = f'  {word} '
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    def __init__(self, faqs):
+        self.faqs = faqs
+        vocabulary = {}
+        postings = defaultdict(dict)
+        for position, faq in enumerate(faqs):
+            for field, weight in FIELD_WEIGHTS.items():
+                for word in words(getattr(faq, field)):
+                    word_id = vocabulary.setdefault(word, len(vocabulary))
+                    postings[word_id][position] = max(postings[word_id].get(position, 0.0), weight)
+
+        grams = defaultdict(list)
+        self.gram_counts = np.zeros(len(vocabulary), dtype=np.float32)
+        for word, word_id in vocabulary.items():
+            word_grams = trigrams(word)
+            self.gram_counts[word_id] = len(word_grams)
+            for gram in word_grams:
+                grams[gram].append(word_id)
+        self.grams = {gram: np.array(ids, dtype=np.int32) for gram, ids in grams.items()}
+        self.docs = [None] * len(vocabulary)
+        for word_id, entries in postings.items():
+            self.docs[word_id] = (
+                np.fromiter(entries.keys(), dtype=np.int32, count=len(entries)),
+                np.fromiter(entries.values(), dtype=np.float32, count=len(entries)),
+            )
+
+    def _expand(self, word):
+        """Vocabulary ids similar to ``word`` and their similarities."""
+        query_grams = trigrams(word)
+        hits = [self.grams[gram] for gram in query_grams if gram in self.grams]
+        if not hits:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.gram_counts))
+        similarity = shared / (len(query_grams) + self.gram_counts - shared)
+        candidates = np.flatnonzero(similarity >= MIN_SIMILARITY)
+        if len(candidates) > MAX_EXPANSIONS:
+            candidates = candidates[np.argsort(-similarity[candidates])[:MAX_EXPANSIONS]]
+        return candidates, similarity[candidates]
+
+    def search(self, query, limit=MAX_RESULTS, category=None):
+        """Return ``[(faq, score), ...]``, best match first."""
+        terms = list(dict.fromkeys(words(query)))
+        if not terms or not self.faqs:
+            return []
+        scores = np.zeros(len(self.faqs), dtype=np.float32)
+        for term in terms:
+            best = np.zeros(len(self.faqs), dtype=np.float32)
+            for word_id, similarity in zip(*self._expand(term)):
+                docs, weights = self.docs[word_id]
+                best[docs] = np.maximum(best[docs], weights * similarity)
+            scores += best
+        ranked = np.argsort(-scores, kind='stable')
+        results = []
+        for position in ranked:
+            if scores[position] <= 0:
+                break
+            faq = self.faqs[position]
+            if category and faq.category != category:
+                continue
+            results.append((faq, float(scores[position])))
+            if len(results) == limit:
+                break
+        return results
+
+
+def build_index():
+    snapshot = cache.groups.get()
+    return TrigramIndex([faq for group in snapshot['groups'] for faq in group['faqs']])
+
+
+index = Snapshot('faq:search', build_index, version=cache.groups.current_version)
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache
+from .models import FAQ
+
+
+@receiver([post_save, post_delete], sender=FAQ)
+def invalidate_faq_groups(sender, **kwargs):
+    cache.groups.invalidate()
@@ -1,3 +1,50 @@
-from django.test import TestCase
+from core.testing import QueryBudgetTestCase
+from .models import FAQ
 
-# Create your tests here.
+class FAQQueryBudgetTests(QueryBudgetTestCase):
+
+    def add_faqs(self, count):
+        for index in range(count):
+            FAQ.objects.create(question=f'Question {index}?', answer='Answer.', order=index)
+
+    def test_faq(self):
+        self.assertBudgetHolds('/faq/', 1, self.add_faqs)
+
+    def test_grouped_snapshot(self):
+        FAQ.objects.create(question='How much?', answer='Depends.', category='pricing', order=1)
+        FAQ.objects.create(question='Which stack?', answer='Django.', category='technical', order=2)
+        FAQ.objects.create(question='Retired?', answer='Yes.', category='technical', is_active=False)
+        self.add_faqs(2)
+        self.assertQueryBudget('/faq/', 1)
+        response = self.assertQueryBudget('/faq/', 0)
+        self.assertEqual([group['key'] for group in response.context['groups']], ['services', 'technical', 'pricing'])
+        self.assertEqual(response.context['total_faqs'], 4)
+        self.assertNotContains(response, 'Retired?')
+        self.assertNotContains(response, '?category=training')
+
+        response = self.assertQueryBudget('/faq/?category=technical', 0)
+        self.assertContains(response, 'Which stack?')
+        self.assertNotContains(response, 'How much?')
+        response = self.assertQueryBudget('/faq/?category=unknown', 0)
+        self.assertEqual(response.context['current_category'], 'all')
+
+        FAQ.objects.create(question='Training length?', answer='Six weeks.', category='training')
+        response = self.assertQueryBudget('/faq/?category=training', 1)
+        self.assertContains(response, 'Training length?')
+
+    def test_fuzzy_search(self):
+        FAQ.objects.create(question='What are your payment terms?', answer='50% upfront.', category='pricing')
+        FAQ.objects.create(question='Do you offer training programs?', answer='Yes, <b>Django</b> courses.', category='training')
+        FAQ.objects.create(question='Hidden payment question?', answer='Hidden.', category='pricing', is_active=False)
+        self.assertQueryBudget('/faq/search/?q=paymnt', 1)
+        results = self.assertQueryBudget('/faq/search/?q=paymnt', 0).json()['results']
+        self.assertEqual([result['question'] for result in results], ['What are your payment terms?'])
+
+        results = self.client.get('/faq/search/?q=djang+traning').json()['results']
+        self.assertEqual(results[0]['question'], 'Do you offer training programs?')
+        results = self.client.get('/faq/search/?q=training&category=pricing').json()['results']
+        self.assertEqual(results, [])
+
+        FAQ.objects.create(question='Which payment methods?', answer='Bank transfer.', category='pricing')
+        results = self.client.get('/faq/search/?q=payment').json()['results']
+        self.assertEqual(len(results), 2)
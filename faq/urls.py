@@ -3,4 +3,5 @@ from . import views
 
 urlpatterns = [
     path('', views.faq, name='faq'),
+    path('search/', views.faq_search, name='faq_search'),
 ]
@@ -1,8 +1,37 @@
+from django.http import JsonResponse
 from django.shortcuts import render
-from .models import FAQ
+from core.conditional import conditional_page
+from core.snapshots import version_time
+from . import cache, search
 
+def _faq_validators(request, *args, **kwargs):
+    version = cache.groups.version
+    return [version], version_time(version)
+
+@conditional_page(_faq_validators)
 def faq(request):
-    faqs = FAQ.objects.filter(is_active=True)
+    snapshot = cache.groups.get()
+    category = request.GET.get('category', 'all')
+    if category in snapshot['by_key']:
+        groups = [snapshot['by_key'][category]]
+    else:
+        category = 'all'
+        groups = snapshot['groups']
     return render(request, 'faq.html', {
-        'faqs': faqs
+        'groups': groups,
+        'categories': snapshot['groups'],
+        'total_faqs': snapshot['count'],
+        'current_category': category,
+    })
+
+def faq_search(request):
+    query = request.GET.get('q', '')[:100]
+    category = request.GET.get('category')
+    results = search.index.get().search(query, category=category if category != 'all' else None)
+    return JsonResponse({
+        'query': query,
+        'results': [
+            {'id': faq.pk, 'question': faq.question, 'category': faq.category, 'score': round(score, 3)}
+            for faq, score in results
+        ],
     })
@@ -1,3 +1,7 @@
-from django.test import TestCase
+from core.testing import QueryBudgetTestCase
 
-# Create your tests here.
+class StaticPagesQueryBudgetTests(QueryBudgetTestCase):
+
+    def test_static_pages(self):
+        for url in ('/', '/about/', '/contact/'):
+            self.assertQueryBudget(url, 0)
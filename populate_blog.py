@@ -128,7 +128,7 @@ The key to success with DRF is understanding the separation of concerns between
             'excerpt': 'Learn how to build powerful REST APIs with Django REST Framework. This comprehensive guide covers installation, serialization, authentication, and best practices.',
             'author': 'Suresh Kumar Yadav',
             'published': True,
-            'tags': 'Django, REST API, Python, Web Development'
+            'tags': ['Django', 'REST API', 'Python', 'Web Development']
         },
         {
             'title': 'React Hooks: A Complete Guide for Beginners',
@@ -311,7 +311,7 @@ Start small by converting simple class components to function components with ho
             'excerpt': 'Master React Hooks from basics to advanced patterns. Learn useState, useEffect, useContext, and how to create custom hooks for reusable logic.',
             'author': 'Suresh Kumar Yadav',
             'published': True,
-            'tags': 'React, JavaScript, Hooks, Frontend'
+            'tags': ['React', 'JavaScript', 'Hooks', 'Frontend']
         },
         {
             'title': 'Building Modern Web Applications with Django and React',
@@ -726,7 +726,7 @@ The key to success is maintaining clear separation between frontend and backend
             'excerpt': 'Learn how to build full-stack web applications using Django for the backend and React for the frontend. Includes authentication, state management, and deployment.',
             'author': 'Suresh Kumar Yadav',
             'published': True,
-            'tags': 'Django, React, Full-Stack, Web Development'
+            'tags': ['Django', 'React', 'Full-Stack', 'Web Development']
         },
         {
             'title': 'Python Best Practices for Clean and Maintainable Code',
@@ -1175,7 +1175,7 @@ Remember that code is read much more often than it's written, so prioritize read
             'excerpt': 'Master Python best practices for writing clean, maintainable code. Covers style, structure, testing, documentation, and performance optimization.',
             'author': 'Suresh Kumar Yadav',
             'published': True,
-            'tags': 'Python, Best Practices, Clean Code, Development'
+            'tags': ['Python', 'Best Practices', 'Clean Code', 'Development']
         },
         {
             'title': 'Deploying Django Applications to AWS',
@@ -1614,7 +1614,7 @@ The key to successful AWS deployment is understanding your application's archite
             'excerpt': 'Learn how to deploy Django applications to AWS using various services like Elastic Beanstalk, EC2, ECS, and Lambda. Includes production configuration and best practices.',
             'author': 'Suresh Kumar Yadav',
             'published': True,
-            'tags': 'Django, AWS, Deployment, Cloud'
+            'tags': ['Django', 'AWS', 'Deployment', 'Cloud']
         }
     ]
 
@@ -0,0 +1,34 @@
+"""
+Portfolio content version.
+
+``portfolio.signals`` bumps it whenever a ``Project`` or ``Category`` is saved
+or deleted. Page validators and cached totals include it, so they change
+together across all workers without querying the tables. ``categories`` is
+the filter chip data, rebuilt in each worker when the version moves.
+"""
+from django.db.models import Count
+
+from core.snapshots import Snapshot, bump_version, get_version
+
+from .models import Category
+
+VERSION_KEY = 'portfolio:version'
+
+
+def content_version():
+    return get_version(VERSION_KEY)
+
+
+def bump():
+    bump_version(VERSION_KEY)
+
+
+def build_categories():
+    """Categories that have projects, with their counts, from one query."""
+    rows = Category.objects.annotate(project_count=Count('project')).filter(
+        project_count__gt=0
+    ).order_by('name').values('id', 'name', 'slug', 'project_count')
+    return list(rows)
+
+
+categories = Snapshot('portfolio:categories', build_categories, version=content_version)
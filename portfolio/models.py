@@ -1,8 +1,11 @@
 from django.db import models
 
+from core.tagging import parse_tags
+
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -13,10 +16,23 @@ class Project(models.Model):
     image = models.ImageField(upload_to='projects/')
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
     tags = models.JSONField(default=list, help_text="List of tags")
+    tag_index = models.ManyToManyField('core.Tag', blank=True, editable=False, related_name='projects')
     demo_url = models.URLField(blank=True, null=True)
     github_url = models.URLField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Back keyset pagination of the grid on (created_at, id), overall
+            # and within a category.
+            models.Index(fields=['created_at', 'id'], name='portfolio_project_recent_idx'),
+            models.Index(fields=['category', 'created_at', 'id'], name='portfolio_project_cat_idx'),
+        ]
+
     def __str__(self):
         return self.title
+
+    def save(self, *args, **kwargs):
+        self.tags = parse_tags(self.tags)
+        super().save(*args, **kwargs)
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.images import queue_for
+from core.tagging import sync_tags
+
+from . import cache
+from .models import Category, Project
+
+
+@receiver(post_save, sender=Project)
+def index_project_tags(sender, instance, **kwargs):
+    sync_tags(instance)
+
+
+@receiver(post_save, sender=Project)
+def build_project_images(sender, instance, **kwargs):
+    queue_for(instance.image)
+
+
+@receiver([post_save, post_delete], sender=Project)
+@receiver([post_save, post_delete], sender=Category)
+def bump_portfolio_version(sender, **kwargs):
+    cache.bump()
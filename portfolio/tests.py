@@ -1,3 +1,121 @@
-from django.test import TestCase
+import re
+import shutil
+import tempfile
+from io import BytesIO
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from PIL import Image
+
+from core import jobs
+from core.models import Job
+from core.testing import BAD_CURSORS, QueryBudgetTestCase
+from .models import Category, Project
+from .views import PAGE_SIZE
+
+class PortfolioQueryBudgetTests(QueryBudgetTestCase):
+
+    def add_projects(self, count):
+        for index in range(count):
+            category, _ = Category.objects.get_or_create(
+                slug=f'category-{index % 3}', defaults={'name': f'Category {index % 3}'}
+            )
+            Project.objects.create(
+                title=f'Project {Project.objects.count()}',
+                description='Description',
+                image='projects/example.jpg',
+                category=category,
+                tags=['Django', 'Python'],
+            )
+
+    def test_portfolio(self):
+        self.assertBudgetHolds('/portfolio/', 2, self.add_projects)
+
+    def test_portfolio_category_filter(self):
+        self.assertBudgetHolds('/portfolio/?category=category-1', 2, self.add_projects)
+
+    def test_portfolio_tag_filter(self):
+        self.assertBudgetHolds('/portfolio/?tag=django', 3, self.add_projects)
+
+    def test_portfolio_load_more(self):
+        self.add_projects(PAGE_SIZE * 2 + 1)
+        response = self.assertQueryBudget('/portfolio/', 2)
+        seen = [project.pk for project in response.context['projects']]
+        cursor = response.context['projects'].next_cursor
+        self.assertEqual(response.context['projects'].total, PAGE_SIZE * 2 + 1)
+        while cursor:
+            data = self.assertQueryBudget(f'/portfolio/more/?after={cursor}', 1).json()
+            seen.extend(int(pk) for pk in re.findall(r'data-project-id="(\d+)"', data['html']))
+            cursor = data['next']
+        expected = list(Project.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_category_chips(self):
+        self.add_projects(4)
+        Category.objects.create(name='Empty', slug='empty')
+        response = self.assertQueryBudget('/portfolio/', 2)
+        chips = [(category['slug'], category['project_count']) for category in response.context['categories']]
+        self.assertEqual(chips, [('category-0', 2), ('category-1', 1), ('category-2', 1)])
+        self.assertEqual(response.context['total_projects'], 4)
+        self.assertNotContains(response, '?category=empty')
+
+        response = self.assertQueryBudget('/portfolio/?category=category-0', 1)
+        self.assertEqual(response.context['projects'].total, 2)
+        self.assertEqual(len(response.context['projects']), 2)
+
+        Project.objects.filter(category__slug='category-1').get().delete()
+        response = self.assertQueryBudget('/portfolio/', 2)
+        self.assertNotContains(response, '?category=category-1')
+
+    def test_project_detail(self):
+        self.add_projects(1)
+        project = Project.objects.get()
+        url = f'/portfolio/{project.pk}/'
+        response = self.assertQueryBudget(url, 2)
+        self.assertEqual(response.json()['title'], project.title)
+        self.assertQueryBudget(url, 1)
+        self.assertQueryBudget(url, 1, status=304, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertQueryBudget('/portfolio/0/', 1, status=404)
+
+    def test_bad_cursors(self):
+        self.add_projects(PAGE_SIZE + 1)
+        first_page = [project.pk for project in self.client.get('/portfolio/').context['projects']]
+        for cursor in BAD_CURSORS:
+            response = self.client.get(f'/portfolio/?after={cursor}')
+            self.assertEqual(response.status_code, 200, cursor)
+            self.assertEqual([project.pk for project in response.context['projects']], first_page)
+            self.assertEqual(self.client.get(f'/portfolio/more/?after={cursor}').status_code, 400, cursor)
+
+class ProjectImageTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_detail_picks_up_derivatives_built_later(self):
+        buffer = BytesIO()
+        Image.new('RGB', (800, 500), 'teal').save(buffer, format='JPEG')
+        image = default_storage.save('projects/shot.jpg', ContentFile(buffer.getvalue()))
+        category = Category.objects.create(name='Web', slug='web')
+        project = Project.objects.create(title='Shop', description='Description', image=image, category=category)
+        url = f'/portfolio/{project.pk}/'
+
+        before = self.client.get(url)
+        self.assertNotIn('<picture', before.json()['html'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=before['ETag']).status_code, 304)
+        listing_etag = self.client.get('/portfolio/')['ETag']
+
+        job = Job.objects.get(kind='images.derivatives')
+        jobs.run(job.kind, job.payload)
+        after = self.client.get(url, HTTP_IF_NONE_MATCH=before['ETag'])
+        self.assertEqual(after.status_code, 200)
+        self.assertNotEqual(after['ETag'], before['ETag'])
+        self.assertIn('shot.jpg.w320.webp', after.json()['html'])
+        listing = self.client.get('/portfolio/', HTTP_IF_NONE_MATCH=listing_etag)
+        self.assertEqual(listing.status_code, 200)
+        self.assertContains(listing, 'shot.jpg.w320.webp')
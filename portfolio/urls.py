@@ -3,4 +3,6 @@ from . import views
 
 urlpatterns = [
     path('', views.portfolio, name='portfolio'),
+    path('more/', views.portfolio_more, name='portfolio_more'),
+    path('<int:pk>/', views.project_detail, name='project_detail'),
 ]
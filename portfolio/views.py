@@ -1,15 +1,115 @@
-from django.shortcuts import render
-from .models import Project, Category
+from django.core.cache import cache
+from django.db.models.functions import Substr
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.template.loader import render_to_string
+from django.utils.text import slugify
+from core import images
+from core.conditional import conditional_page, page_etag
+from core.pagination import InvalidCursor, KeysetPaginator
+from core.snapshots import version_time
+from . import cache as portfolio_cache
+from .models import Project
 
-def portfolio(request):
+DETAIL_TIMEOUT = 60 * 60 * 24
+PAGE_SIZE = 9
+
+# Card fields only; the full description is fetched by the details modal.
+CARD_FIELDS = ('title', 'image', 'category__name', 'category__slug', 'tags',
+               'demo_url', 'github_url', 'created_at')
+
+def _portfolio_validators(request, *args, **kwargs):
+    versions = [portfolio_cache.content_version(), images.version()]
+    return versions, max(map(version_time, versions))
+
+def _project_page(request, strict=False):
     category_filter = request.GET.get('category', 'all')
+    tag_filter = request.GET.get('tag', '')
+    projects = Project.objects.select_related('category').only(*CARD_FIELDS).annotate(
+        summary=Substr('description', 1, 101)
+    )
+    version = portfolio_cache.content_version()
+    categories = portfolio_cache.categories.get()
     if category_filter == 'all':
-        projects = Project.objects.all()
+        total = sum(category['project_count'] for category in categories)
     else:
-        projects = Project.objects.filter(category__slug=category_filter)
-    categories = Category.objects.all()
+        # Filter on category_id directly so the (category_id, created_at, id)
+        # index serves the query without a join.
+        category = next((c for c in categories if c['slug'] == category_filter), None)
+        if category is None:
+            projects = projects.none()
+            total = 0
+        else:
+            projects = projects.filter(category_id=category['id'])
+            total = category['project_count']
+    if tag_filter:
+        projects = projects.filter(tag_index__slug=tag_filter)
+    paginator = KeysetPaginator(
+        projects,
+        PAGE_SIZE,
+        ordering=('-created_at', '-id'),
+        approximate_total=bool(tag_filter),
+        count_timeout=DETAIL_TIMEOUT,
+        count_key=f'portfolio:count:{slugify(category_filter)}:{slugify(tag_filter)}:{version}',
+    )
+    try:
+        page_obj = paginator.page(after=request.GET.get('after'))
+    except InvalidCursor:
+        if strict:
+            raise
+        page_obj = paginator.page()
+    if not tag_filter:
+        page_obj.total = total
+    return page_obj, category_filter, tag_filter
+
+@conditional_page(_portfolio_validators)
+def portfolio(request):
+    page_obj, category_filter, tag_filter = _project_page(request)
+    categories = portfolio_cache.categories.get()
     return render(request, 'portfolio.html', {
-        'projects': projects,
+        'projects': page_obj,
         'categories': categories,
-        'current_category': category_filter
+        'total_projects': sum(category['project_count'] for category in categories),
+        'current_category': category_filter,
+        'current_tag': tag_filter
+    })
+
+@conditional_page(_portfolio_validators)
+def portfolio_more(request):
+    try:
+        page_obj, category_filter, tag_filter = _project_page(request, strict=True)
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    html = render_to_string('project_cards.html', {
+        'projects': page_obj,
+        'current_tag': tag_filter,
+    }, request)
+    return JsonResponse({
+        'html': html,
+        'next': page_obj.next_cursor if page_obj.has_next else None,
     })
+
+def _project_validators(request, pk):
+    row = Project.objects.filter(pk=pk).values_list('updated_at', 'category__updated_at').first()
+    if row is None:
+        return None, None
+    # The image version is part of the ETag, and so of the payload cache key.
+    images_version = images.version()
+    return [*row, images_version], max(*row, version_time(images_version))
+
+@conditional_page(_project_validators)
+def project_detail(request, pk):
+    etag = page_etag(request)
+    if etag is None:
+        raise Http404('No such project')
+    key = f'portfolio:project:{etag}'
+    data = cache.get(key)
+    if data is None:
+        project = get_object_or_404(Project.objects.select_related('category'), pk=pk)
+        data = {
+            'id': project.pk,
+            'title': project.title,
+            'html': render_to_string('project_detail.html', {'project': project}, request),
+        }
+        cache.set(key, data, DETAIL_TIMEOUT)
+    return JsonResponse(data)
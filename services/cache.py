@@ -0,0 +1,43 @@
+"""
+Pre-assembled services page.
+
+``page`` holds everything ``services.html`` renders, with each service's
+demo projects attached and its process steps decoded to a list of strings.
+The ``services.signals`` receivers invalidate it when a ``Service`` or
+``DemoProject`` changes; until then a page view runs no queries.
+"""
+import json
+
+from django.db.models import Prefetch
+
+from core.snapshots import Snapshot
+
+from .models import DemoProject, Service
+
+
+def decode_steps(value):
+    """Process steps as a list of strings, whatever shape the JSON holds."""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            value = value.splitlines()
+    if not isinstance(value, (list, tuple)):
+        return []
+    return [str(step).strip() for step in value if str(step).strip()]
+
+
+def build_page():
+    services = list(Service.objects.order_by('id').prefetch_related(
+        Prefetch('demo_projects', queryset=DemoProject.objects.order_by('id'))
+    ))
+    demo_projects = []
+    for service in services:
+        service.steps = decode_steps(service.process_steps)
+        service.demos = list(service.demo_projects.all())
+        demo_projects.extend(service.demos)
+    demo_projects.sort(key=lambda demo: demo.pk)
+    return {'services': services, 'demo_projects': demo_projects}
+
+
+page = Snapshot('services:page', build_page)
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:12
+
+from django.db import migrations, models
+
+from core.tagging import get_tags, parse_tags
+
+
+def populate_tag_index(apps, schema_editor):
+    Tag = apps.get_model('core', 'Tag')
+    DemoProject = apps.get_model('services', 'DemoProject')
+    for obj in DemoProject.objects.all():
+        names = parse_tags(obj.tags)
+        if names != obj.tags:
+            obj.tags = names
+            obj.save(update_fields=['tags'])
+        obj.tag_index.set(get_tags(names, tag_model=Tag))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('services', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='demoproject',
+            name='tag_index',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='demo_projects', to='core.tag'),
+        ),
+        migrations.RunPython(populate_tag_index, migrations.RunPython.noop),
+    ]
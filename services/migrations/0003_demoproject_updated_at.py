@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0002_demoproject_tag_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='demoproject',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 
+from core.tagging import parse_tags
+
 class Service(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
@@ -17,7 +19,13 @@ class DemoProject(models.Model):
     description = models.TextField()
     image = models.ImageField(upload_to='demo_projects/')
     tags = models.JSONField(default=list, help_text="List of tags")
+    tag_index = models.ManyToManyField('core.Tag', blank=True, editable=False, related_name='demo_projects')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title
+
+    def save(self, *args, **kwargs):
+        self.tags = parse_tags(self.tags)
+        super().save(*args, **kwargs)
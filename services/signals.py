@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.images import queue_for
+from core.tagging import sync_tags
+
+from . import cache
+from .models import DemoProject, Service
+
+
+@receiver(post_save, sender=DemoProject)
+def index_demo_project_tags(sender, instance, **kwargs):
+    sync_tags(instance)
+
+
+@receiver(post_save, sender=DemoProject)
+def build_demo_project_images(sender, instance, **kwargs):
+    queue_for(instance.image)
+
+
+@receiver([post_save, post_delete], sender=Service)
+@receiver([post_save, post_delete], sender=DemoProject)
+def invalidate_services_page(sender, **kwargs):
+    cache.page.invalidate()
@@ -1,3 +1,34 @@
-from django.test import TestCase
+from core.testing import QueryBudgetTestCase
+from .models import DemoProject, Service
 
-# Create your tests here.
+class ServicesQueryBudgetTests(QueryBudgetTestCase):
+
+    def add_services(self, count):
+        for index in range(count):
+            service = Service.objects.create(
+                title=f'Service {index}',
+                description='Description',
+                icon='fas fa-code',
+                process_steps=['Plan', 'Build', 'Ship'],
+            )
+            DemoProject.objects.create(
+                service=service,
+                title=f'Demo {index}',
+                description='Description',
+                image='demo_projects/example.jpg',
+                tags=['Django'],
+            )
+
+    def test_services(self):
+        self.assertBudgetHolds('/services/', 2, self.add_services)
+
+    def test_services_snapshot(self):
+        self.add_services(2)
+        self.assertQueryBudget('/services/', 2)
+        response = self.assertQueryBudget('/services/', 0)
+        self.assertContains(response, 'Demo 1')
+        self.assertEqual(response.context['services'][0].steps, ['Plan', 'Build', 'Ship'])
+
+        DemoProject.objects.filter(title='Demo 1').get().delete()
+        response = self.assertQueryBudget('/services/', 2)
+        self.assertNotContains(response, 'Demo 1')
@@ -1,10 +1,13 @@
 from django.shortcuts import render
-from .models import Service, DemoProject
+from core import images
+from core.conditional import conditional_page
+from core.snapshots import version_time
+from . import cache
 
+def _services_validators(request, *args, **kwargs):
+    versions = [cache.page.version, images.version()]
+    return versions, max(map(version_time, versions))
+
+@conditional_page(_services_validators)
 def services(request):
-    services = Service.objects.all()
-    demo_projects = DemoProject.objects.all()
-    return render(request, 'services.html', {
-        'services': services,
-        'demo_projects': demo_projects
-    })
+    return render(request, 'services.html', cache.page.get())
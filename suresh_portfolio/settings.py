@@ -45,6 +45,7 @@ INSTALLED_APPS = [
     'contact',
     'testimonials',
     'faq',
+    'core',
 ]
 
 MIDDLEWARE = [
@@ -90,6 +91,22 @@ DATABASES = {
 }
 
 
+# Cache
+# A file-based cache is shared by every gunicorn worker on the host, so
+# invalidations made by one worker are seen by all of them.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -142,6 +159,13 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = 'your-email@gmail.com'  # Replace with actual email
 EMAIL_HOST_PASSWORD = 'your-app-password'  # Replace with app password
 
+# Seconds between contact form digest emails. None sends one email per message.
+CONTACT_DIGEST_INTERVAL = None
+
+# Reverse proxies in front of the app (e.g. 1 behind a PaaS router). When set,
+# the contact form throttle reads the client address from X-Forwarded-For.
+THROTTLE_TRUSTED_PROXY_COUNT = 0
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
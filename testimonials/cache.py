@@ -0,0 +1,59 @@
+"""
+In-memory snapshot of active testimonials.
+
+``active`` holds the active testimonials and their rating statistics, and is
+invalidated by ``testimonials.signals`` on every save or delete. ``rotation()``
+draws the carousel from it with rating-weighted sampling. The draw is seeded
+by the snapshot version and a ``ROTATE_SECONDS`` time slot, so every worker
+shows the same reviews within a slot and the page stays cacheable with an
+ETag, while the featured reviews still change between visits.
+"""
+import random
+import time
+
+from core.snapshots import Snapshot
+
+from .models import Testimonial
+
+CAROUSEL_SIZE = 3
+ROTATE_SECONDS = 60 * 10
+STARS = (5, 4, 3, 2, 1)
+
+
+def build_active():
+    testimonials = list(Testimonial.objects.filter(is_active=True).order_by('id'))
+    per_star = {star: 0 for star in STARS}
+    for testimonial in testimonials:
+        per_star[testimonial.rating] = per_star.get(testimonial.rating, 0) + 1
+    count = len(testimonials)
+    total = sum(testimonial.rating for testimonial in testimonials)
+    stats = {
+        'count': count,
+        'average': total / count if count else None,
+        'satisfaction': round(100 * sum(1 for t in testimonials if t.rating >= 4) / count) if count else None,
+        'per_star': [
+            {'stars': star, 'count': per_star[star], 'percent': round(100 * per_star[star] / count) if count else 0}
+            for star in STARS
+        ],
+    }
+    return {'testimonials': testimonials, 'stats': stats}
+
+
+active = Snapshot('testimonials:active', build_active)
+
+
+def rotation_slot():
+    return int(time.time() // ROTATE_SECONDS)
+
+
+def rotation(testimonials, seed, size=CAROUSEL_SIZE):
+    """
+    Pick ``size`` testimonials, weighted by rating, without replacement.
+
+    Each item gets the key ``u ** (1 / weight)`` for a uniform ``u`` and the
+    largest keys win (Efraimidis-Spirakis), which is one pass over the list.
+    """
+    rng = random.Random(seed)
+    keyed = [(rng.random() ** (1.0 / max(testimonial.rating, 1)), testimonial) for testimonial in testimonials]
+    keyed.sort(key=lambda item: item[0], reverse=True)
+    return [testimonial for _, testimonial in keyed[:size]]
@@ -8,6 +8,7 @@ class Testimonial(models.Model):
     rating = models.IntegerField(default=5, choices=[(i, i) for i in range(1, 6)])
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.name} - {self.designation}"
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.images import queue_for
+
+from . import cache
+from .models import Testimonial
+
+
+@receiver(post_save, sender=Testimonial)
+def build_testimonial_images(sender, instance, **kwargs):
+    queue_for(instance.image)
+
+
+@receiver([post_save, post_delete], sender=Testimonial)
+def invalidate_active_testimonials(sender, **kwargs):
+    cache.active.invalidate()
@@ -1,3 +1,45 @@
-from django.test import TestCase
+from core.testing import QueryBudgetTestCase
+from . import cache
+from .models import Testimonial
 
-# Create your tests here.
+class TestimonialsQueryBudgetTests(QueryBudgetTestCase):
+
+    def add_testimonials(self, count):
+        for index in range(count):
+            Testimonial.objects.create(
+                name=f'Client {index}',
+                designation='Student',
+                message='Great trainer.',
+                rating=5,
+            )
+
+    def test_testimonials(self):
+        self.assertBudgetHolds('/testimonials/', 1, self.add_testimonials)
+
+    def test_snapshot_stats_and_rotation(self):
+        self.add_testimonials(4)
+        Testimonial.objects.create(name='Critic', designation='Client', message='Okay.', rating=3)
+        Testimonial.objects.create(name='Hidden', designation='Client', message='Hidden.', is_active=False)
+        self.assertQueryBudget('/testimonials/', 1)
+        response = self.assertQueryBudget('/testimonials/', 0)
+
+        stats = response.context['stats']
+        self.assertEqual(stats['count'], 5)
+        self.assertAlmostEqual(stats['average'], 4.6)
+        self.assertEqual([row['count'] for row in stats['per_star']], [4, 0, 1, 0, 0])
+        carousel = response.context['carousel_testimonials']
+        self.assertEqual(len(carousel), 3)
+        self.assertEqual(len({testimonial.pk for testimonial in carousel}), 3)
+        self.assertNotIn('Hidden', [testimonial.name for testimonial in carousel])
+
+        Testimonial.objects.filter(name='Critic').update(is_active=False)
+        Testimonial.objects.get(name='Hidden').save()
+        response = self.assertQueryBudget('/testimonials/', 1)
+        self.assertEqual(response.context['stats']['count'], 4)
+
+    def test_rotation_is_weighted_by_rating(self):
+        low = Testimonial(pk=1, rating=1)
+        high = Testimonial(pk=2, rating=5)
+        firsts = [cache.rotation([low, high], seed, size=1)[0].pk for seed in range(2000)]
+        # P(high first) = 5 / 6 with weights 5 and 1.
+        self.assertGreater(firsts.count(2), 1500)
@@ -1,11 +1,25 @@
+from datetime import datetime, timezone
+
 from django.shortcuts import render
-from .models import Testimonial
+from core import images
+from core.conditional import conditional_page
+from core.snapshots import version_time
+from . import cache
+
+def _testimonials_validators(request, *args, **kwargs):
+    version = cache.active.version
+    images_version = images.version()
+    slot = cache.rotation_slot()
+    # The carousel changes with the rotation slot as well as the content.
+    slot_start = datetime.fromtimestamp(slot * cache.ROTATE_SECONDS, tz=timezone.utc)
+    return [version, images_version, slot], max(version_time(version), version_time(images_version), slot_start)
 
+@conditional_page(_testimonials_validators)
 def testimonials(request):
-    testimonials = Testimonial.objects.filter(is_active=True)
-    # Get first 3 testimonials for carousel (or all if fewer than 3)
-    carousel_testimonials = testimonials[:3] if testimonials.count() >= 3 else testimonials
+    snapshot = cache.active.get()
+    seed = f'{cache.active.version}:{cache.rotation_slot()}'
     return render(request, 'testimonials.html', {
-        'testimonials': testimonials,
-        'carousel_testimonials': carousel_testimonials
+        'testimonials': snapshot['testimonials'],
+        'carousel_testimonials': cache.rotation(snapshot['testimonials'], seed),
+        'stats': snapshot['stats'],
     })